@@ -6,36 +6,71 @@ Shows both LLM-powered and fallback modes
 
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import subprocess
 import os
-from typing import Dict, Any
+import sys
+from typing import Dict, Any, List, Tuple
+
+# MCP calls made by each demo scenario
+FEVER_CALL = ("analyze_symptoms", {"symptoms": "I have fever", "age": "adult"})
+MEDICINE_CALL = ("suggest_medicine", {"condition": "headache", "age": "adult"})
+REMEDIES_CALL = ("get_remedies", {"condition": "cold and cough"})
+EMERGENCY_CALL = ("analyze_symptoms", {
+    "symptoms": "severe chest pain and difficulty breathing",
+    "age": "adult"
+})
+TOOLS_CALL = ("list_tools", {})
+
+
+def emit_lines(lines: List[str]):
+    """Write a block of output lines with a single stdout write"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 
 class MedicalAssistantDemo:
+    # Server process shared by every demo instance in this interpreter
+    _shared_proc = None
+
     def __init__(self):
         self.base_url = "http://localhost:8000"
         self.server_process = None
+        # One keep-alive connection pool for every call the demo makes
+        self.session = requests.Session()
+        self.session.mount(
+            "http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update({"Content-Type": "application/json"})
 
     def start_server(self):
-        """Start the MCP server"""
+        """Start the MCP server, reusing one that is already running"""
+        shared = MedicalAssistantDemo._shared_proc
+        if shared is not None and shared.poll() is None:
+            self.server_process = shared
+            print("✅ Reusing running server")
+            return True
+
         print("🚀 Starting Medical Assistant MCP Server...")
         self.server_process = subprocess.Popen(
             ["python", "web_server.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            # Discard server logs: an unread PIPE fills up and blocks the server
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
-        time.sleep(3)  # Give server time to start
-
-        # Test if server is running
-        try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            if response.status_code == 200:
-                print("✅ Server started successfully!")
-                return True
-        except:
-            pass
+        MedicalAssistantDemo._shared_proc = self.server_process
+
+        # Poll the health endpoint until the server is up
+        for _ in range(100):
+            try:
+                response = self.session.get(
+                    f"{self.base_url}/health", timeout=0.5)
+                if response.status_code == 200:
+                    print("✅ Server started successfully!")
+                    return True
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.1)
         print("❌ Failed to start server")
         return False
 
@@ -43,6 +78,8 @@ class MedicalAssistantDemo:
         """Stop the MCP server"""
         if self.server_process:
             self.server_process.terminate()
+            if MedicalAssistantDemo._shared_proc is self.server_process:
+                MedicalAssistantDemo._shared_proc = None
             print("🛑 Server stopped")
 
     def call_mcp_tool(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -54,9 +91,8 @@ class MedicalAssistantDemo:
         }
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/mcp",
-                headers={"Content-Type": "application/json"},
                 json=payload,
                 timeout=10
             )
@@ -64,178 +100,210 @@ class MedicalAssistantDemo:
         except Exception as e:
             return {"error": str(e)}
 
-    def demo_fever_scenario(self):
+    def call_mcp_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Call several MCP tools in a single round trip"""
+        payload = {
+            "batch": [
+                {"method": method, "params": params, "id": f"demo-{method}"}
+                for method, params in calls
+            ]
+        }
+
+        try:
+            response = self.session.post(
+                f"{self.base_url}/mcp",
+                json=payload,
+                timeout=10
+            )
+            results = response.json()
+            if isinstance(results, list):
+                return results
+            error = results.get("error", "Unexpected batch response")
+        except Exception as e:
+            error = str(e)
+        return [{"error": error} for _ in calls]
+
+    def demo_fever_scenario(self, result: Dict[str, Any] = None):
         """Demo: User says 'I have fever'"""
-        print("\n" + "="*60)
-        print("🏥 DEMO: Medical Assistant - 'I have fever'")
-        print("="*60)
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("🏥 DEMO: Medical Assistant - 'I have fever'")
+        lines.append("="*60)
 
         # Analyze symptoms
-        print("\n🔍 Analyzing symptoms...")
-        result = self.call_mcp_tool("analyze_symptoms", {
-            "symptoms": "I have fever",
-            "age": "adult"
-        })
+        lines.append("\n🔍 Analyzing symptoms...")
+        if result is None:
+            result = self.call_mcp_tool(*FEVER_CALL)
 
         if "result" in result:
             data = result["result"]
-            print(
+            lines.append(
                 f"📊 Triage Level: {data.get('triage_level', 'unknown').upper()}")
-            print(f"🎯 Condition: {data.get('condition', 'unknown').title()}")
-            print(f"📝 Assessment: {data.get('assessment', 'N/A')}")
+            lines.append(f"🎯 Condition: {data.get('condition', 'unknown').title()}")
+            lines.append(f"📝 Assessment: {data.get('assessment', 'N/A')}")
 
             # Show medicine suggestions
             if "medicine_suggestion" in data:
                 med = data["medicine_suggestion"]
-                print(f"\n💊 Recommended Medicine:")
-                print(f"   Medicine: {med.get('medicine', 'N/A')}")
-                print(f"   Dose: {med.get('dose', 'N/A')}")
-                print(f"   Warning: {med.get('warning', 'N/A')}")
+                lines.append(f"\n💊 Recommended Medicine:")
+                lines.append(f"   Medicine: {med.get('medicine', 'N/A')}")
+                lines.append(f"   Dose: {med.get('dose', 'N/A')}")
+                lines.append(f"   Warning: {med.get('warning', 'N/A')}")
 
             # Show OTC medicines (new LLM format)
             if "otc_medicines" in data:
-                print(f"\n💊 OTC Medicines:")
+                lines.append(f"\n💊 OTC Medicines:")
                 for med in data["otc_medicines"]:
-                    print(
+                    lines.append(
                         f"   • {med.get('name', 'N/A')} - {med.get('dose', 'N/A')}")
 
             # Show home remedies
             if "home_remedies" in data:
-                print(f"\n🏠 Home Remedies:")
+                lines.append(f"\n🏠 Home Remedies:")
                 for remedy in data["home_remedies"][:3]:  # Show first 3
-                    print(f"   • {remedy}")
+                    lines.append(f"   • {remedy}")
 
-            print(f"\n⚠️ Warning Signs to Watch:")
+            lines.append(f"\n⚠️ Warning Signs to Watch:")
             for warning in data.get("warning_signs", [])[:2]:
-                print(f"   • {warning}")
+                lines.append(f"   • {warning}")
 
-            print(f"\n📋 Follow-up: {data.get('follow_up', 'N/A')}")
+            lines.append(f"\n📋 Follow-up: {data.get('follow_up', 'N/A')}")
 
             # Show if LLM was used or fallback
             if "llm_error" in data:
-                print(f"\n🤖 Mode: Fallback (LLM unavailable)")
-                print(f"   Reason: {data['llm_error'][:50]}...")
+                lines.append(f"\n🤖 Mode: Fallback (LLM unavailable)")
+                lines.append(f"   Reason: {data['llm_error'][:50]}...")
             else:
-                print(f"\n🤖 Mode: LLM-Powered")
+                lines.append(f"\n🤖 Mode: LLM-Powered")
 
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            lines.append(f"❌ Error: {result.get('error', 'Unknown error')}")
+
+        emit_lines(lines)
 
-    def demo_medicine_suggestion(self):
+    def demo_medicine_suggestion(self, result: Dict[str, Any] = None):
         """Demo: Medicine suggestion for specific condition"""
-        print("\n" + "="*60)
-        print("💊 DEMO: Medicine Suggestion - 'headache'")
-        print("="*60)
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("💊 DEMO: Medicine Suggestion - 'headache'")
+        lines.append("="*60)
 
-        result = self.call_mcp_tool("suggest_medicine", {
-            "condition": "headache",
-            "age": "adult"
-        })
+        if result is None:
+            result = self.call_mcp_tool(*MEDICINE_CALL)
 
         if "result" in result:
             data = result["result"]
-            print(f"🎯 Condition: {data.get('condition', 'N/A')}")
+            lines.append(f"🎯 Condition: {data.get('condition', 'N/A')}")
 
             if "recommended_medicine" in data:
-                print(
+                lines.append(
                     f"💊 Recommended: {data.get('recommended_medicine', 'N/A')}")
-                print(f"📏 Dosage: {data.get('dosage', 'N/A')}")
-                print(f"⏰ Frequency: {data.get('frequency', 'N/A')}")
+                lines.append(f"📏 Dosage: {data.get('dosage', 'N/A')}")
+                lines.append(f"⏰ Frequency: {data.get('frequency', 'N/A')}")
 
                 warnings = data.get("warnings", [])
                 if warnings:
-                    print(f"⚠️ Warnings:")
+                    lines.append(f"⚠️ Warnings:")
                     for warning in warnings:
-                        print(f"   • {warning}")
+                        lines.append(f"   • {warning}")
 
             # New LLM format
             if "medicines" in data:
-                print(f"💊 Suggested Medicines:")
+                lines.append(f"💊 Suggested Medicines:")
                 for med in data["medicines"]:
-                    print(
+                    lines.append(
                         f"   • {med.get('name', 'N/A')} - {med.get('dose', 'N/A')}")
                     if med.get('notes'):
-                        print(f"     Notes: {med['notes']}")
+                        lines.append(f"     Notes: {med['notes']}")
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            lines.append(f"❌ Error: {result.get('error', 'Unknown error')}")
 
-    def demo_home_remedies(self):
+        emit_lines(lines)
+
+    def demo_home_remedies(self, result: Dict[str, Any] = None):
         """Demo: Home remedies"""
-        print("\n" + "="*60)
-        print("🏠 DEMO: Home Remedies - 'cold and cough'")
-        print("="*60)
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("🏠 DEMO: Home Remedies - 'cold and cough'")
+        lines.append("="*60)
 
-        result = self.call_mcp_tool("get_remedies", {
-            "condition": "cold and cough"
-        })
+        if result is None:
+            result = self.call_mcp_tool(*REMEDIES_CALL)
 
         if "result" in result:
             data = result["result"]
-            print(f"🎯 Condition: {data.get('condition', 'N/A')}")
+            lines.append(f"🎯 Condition: {data.get('condition', 'N/A')}")
 
             remedies = data.get("remedies", [])
-            print(f"🏠 Home Remedies:")
+            lines.append(f"🏠 Home Remedies:")
             for i, remedy in enumerate(remedies[:4], 1):  # Show first 4
-                print(f"   {i}. {remedy}")
+                lines.append(f"   {i}. {remedy}")
 
             tips = data.get("general_tips", [])
             if tips:
-                print(f"\n💡 General Tips:")
+                lines.append(f"\n💡 General Tips:")
                 for tip in tips:
-                    print(f"   • {tip}")
+                    lines.append(f"   • {tip}")
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            lines.append(f"❌ Error: {result.get('error', 'Unknown error')}")
+
+        emit_lines(lines)
 
-    def demo_emergency_detection(self):
+    def demo_emergency_detection(self, result: Dict[str, Any] = None):
         """Demo: Emergency detection"""
-        print("\n" + "="*60)
-        print("🚨 DEMO: Emergency Detection - 'chest pain'")
-        print("="*60)
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("🚨 DEMO: Emergency Detection - 'chest pain'")
+        lines.append("="*60)
 
-        result = self.call_mcp_tool("analyze_symptoms", {
-            "symptoms": "severe chest pain and difficulty breathing",
-            "age": "adult"
-        })
+        if result is None:
+            result = self.call_mcp_tool(*EMERGENCY_CALL)
 
         if "result" in result:
             data = result["result"]
             triage = data.get('triage_level', 'unknown')
 
             if triage == "emergency":
-                print("🚨 EMERGENCY DETECTED!")
-                print(f"📞 Action: {data.get('action', 'N/A')}")
-                print(
+                lines.append("🚨 EMERGENCY DETECTED!")
+                lines.append(f"📞 Action: {data.get('action', 'N/A')}")
+                lines.append(
                     f"🔴 Red Flags: {', '.join(data.get('detected_red_flags', []))}")
 
                 contacts = data.get('emergency_contacts', {})
-                print(f"📱 Emergency Contacts:")
+                lines.append(f"📱 Emergency Contacts:")
                 for service, number in contacts.items():
-                    print(f"   {service.title()}: {number}")
+                    lines.append(f"   {service.title()}: {number}")
 
-            print(f"\n⚠️ {data.get('disclaimer', 'N/A')}")
+            lines.append(f"\n⚠️ {data.get('disclaimer', 'N/A')}")
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            lines.append(f"❌ Error: {result.get('error', 'Unknown error')}")
+
+        emit_lines(lines)
 
-    def show_available_tools(self):
+    def show_available_tools(self, result: Dict[str, Any] = None):
         """Show available MCP tools"""
-        print("\n" + "="*60)
-        print("🔧 AVAILABLE MCP TOOLS")
-        print("="*60)
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("🔧 AVAILABLE MCP TOOLS")
+        lines.append("="*60)
 
-        result = self.call_mcp_tool("list_tools", {})
+        if result is None:
+            result = self.call_mcp_tool(*TOOLS_CALL)
 
         if "result" in result and "tools" in result["result"]:
             tools = result["result"]["tools"]
             for i, tool in enumerate(tools, 1):
-                print(f"\n{i}. {tool['name']}")
-                print(f"   Description: {tool['description']}")
+                lines.append(f"\n{i}. {tool['name']}")
+                lines.append(f"   Description: {tool['description']}")
                 params = tool.get('parameters', {})
                 if params:
-                    print(f"   Parameters:")
+                    lines.append(f"   Parameters:")
                     for param, desc in params.items():
-                        print(f"     • {param}: {desc}")
+                        lines.append(f"     • {param}: {desc}")
         else:
-            print(f"❌ Error: {result.get('error', 'Unknown error')}")
+            lines.append(f"❌ Error: {result.get('error', 'Unknown error')}")
+
+        emit_lines(lines)
 
     def run_complete_demo(self):
         """Run the complete demo"""
@@ -248,28 +316,34 @@ class MedicalAssistantDemo:
             return
 
         try:
+            # Fetch every scenario in one round trip
+            tools, fever, medicine, remedies, emergency = self.call_mcp_batch([
+                TOOLS_CALL, FEVER_CALL, MEDICINE_CALL, REMEDIES_CALL, EMERGENCY_CALL
+            ])
+
             # Show available tools
-            self.show_available_tools()
+            self.show_available_tools(tools)
 
             # Demo scenarios
-            self.demo_fever_scenario()
-            self.demo_medicine_suggestion()
-            self.demo_home_remedies()
-            self.demo_emergency_detection()
-
-            print("\n" + "="*60)
-            print("✅ DEMO COMPLETE!")
-            print("="*60)
-            print("🚀 Your MCP server is ready for Puch.ai integration!")
-            print("📍 Server URL: http://localhost:8000")
-            print("🧪 Test page: http://localhost:8000/demo")
-            print("📚 API docs: http://localhost:8000/docs")
-
-            print("\n💡 To use with OpenAI LLM:")
-            print("   1. Add your OpenAI API key to .env:")
-            print("      OPENAI_API_KEY=sk-your-key-here")
-            print("   2. Restart the server")
-            print("   3. Responses will be dynamically generated!")
+            self.demo_fever_scenario(fever)
+            self.demo_medicine_suggestion(medicine)
+            self.demo_home_remedies(remedies)
+            self.demo_emergency_detection(emergency)
+
+            emit_lines([
+                "\n" + "="*60,
+                "✅ DEMO COMPLETE!",
+                "="*60,
+                "🚀 Your MCP server is ready for Puch.ai integration!",
+                "📍 Server URL: http://localhost:8000",
+                "🧪 Test page: http://localhost:8000/demo",
+                "📚 API docs: http://localhost:8000/docs",
+                "\n💡 To use with OpenAI LLM:",
+                "   1. Add your OpenAI API key to .env:",
+                "      OPENAI_API_KEY=sk-your-key-here",
+                "   2. Restart the server",
+                "   3. Responses will be dynamically generated!"
+            ])
 
         finally:
             input("\nPress Enter to stop the server...")
@@ -3,15 +3,50 @@ Simple configuration for Medical MCP Server MVP
 """
 
 import os
-from typing import List
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
 
-# Basic server settings
-HOST = os.getenv("HOST", "0.0.0.0")
-PORT = int(os.getenv("PORT", 8000))
-DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
-# API Keys (add when needed)
-GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
+@dataclass(frozen=True)
+class Settings:
+    """Environment-driven server settings"""
+    # Basic server settings
+    HOST: str
+    PORT: int
+    DEBUG: bool
+    DEV: bool
+    PROD: bool
+    WEB_CONCURRENCY: int
+
+    # API Keys (add when needed)
+    GOOGLE_PLACES_API_KEY: Optional[str]
+
+    # Optional semantic cache (needs sentence-transformers and faiss-cpu)
+    SEMANTIC_CACHE_ENABLED: bool
+    SEMANTIC_MODEL: str
+    SEMANTIC_THRESHOLD: float
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Read settings from the environment once (call after load_dotenv)"""
+    return Settings(
+        HOST=os.getenv("HOST", "0.0.0.0"),
+        PORT=int(os.getenv("PORT", 8000)),
+        DEBUG=os.getenv("DEBUG", "true").lower() == "true",
+        DEV=os.getenv("DEV") == "1",
+        PROD=os.getenv("ENV") == "prod",
+        # One worker unless a deployment opts in: session logs are per process
+        WEB_CONCURRENCY=int(os.getenv("WEB_CONCURRENCY", 1)),
+        GOOGLE_PLACES_API_KEY=os.getenv("GOOGLE_PLACES_API_KEY"),
+        SEMANTIC_CACHE_ENABLED=os.getenv(
+            "SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+        SEMANTIC_MODEL=os.getenv(
+            "SEMANTIC_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+        SEMANTIC_THRESHOLD=float(os.getenv("SEMANTIC_THRESHOLD", 0.85)),
+    )
+
 
 # Medical safety settings
 EMERGENCY_KEYWORDS = [
@@ -39,11 +74,8 @@ TRIAGE_LEVELS = {
     "self_care": "Can be managed with self-care and monitoring"
 }
 
-# Data directories
+# Data directories (created by the server on startup)
 DATA_DIR = "data"
-SESSIONS_FILE = f"{DATA_DIR}/sessions.json"
+SESSIONS_FILE = f"{DATA_DIR}/sessions.jsonl"
 MEDICINES_FILE = f"{DATA_DIR}/medicines.json"
 REMEDIES_FILE = f"{DATA_DIR}/remedies.json"
-
-# Ensure data directory exists
-os.makedirs(DATA_DIR, exist_ok=True)
@@ -9,15 +9,25 @@ import requests
 import time
 import subprocess
 import os
+import sys
+
+# Reuse one keep-alive connection for all demo requests
+session = requests.Session()
+session.headers.update({"Content-Type": "application/json"})
+
+def emit_lines(lines):
+    """Write a block of output lines with a single stdout write"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 def start_server():
     """Start the MCP server"""
     print("🚀 Starting Medical Assistant MCP Server...")
     server = subprocess.Popen(
         ["python", "web_server.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+        # Discard server logs: an unread PIPE fills up and blocks the server
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
     )
     time.sleep(3)
     return server
@@ -31,9 +41,8 @@ def call_mcp_tool(method, params):
     }
     
     try:
-        response = requests.post(
+        response = session.post(
             "http://localhost:8000/mcp",
-            headers={"Content-Type": "application/json"},
             json=payload,
             timeout=10
         )
@@ -43,13 +52,14 @@ def call_mcp_tool(method, params):
 
 def demo_fever():
     """Demo: 'I have fever' - Complete response"""
-    print("\n" + "="*60)
-    print("🏥 MEDICAL ASSISTANT DEMO: 'I have fever'")
-    print("="*60)
+    lines = []
+    lines.append("\n" + "="*60)
+    lines.append("🏥 MEDICAL ASSISTANT DEMO: 'I have fever'")
+    lines.append("="*60)
     
     # Your prompt: "I have fever"
-    print("\n👤 User: 'I have fever'")
-    print("\n🤖 Medical Assistant analyzing...")
+    lines.append("\n👤 User: 'I have fever'")
+    lines.append("\n🤖 Medical Assistant analyzing...")
     
     result = call_mcp_tool("analyze_symptoms", {
         "symptoms": "I have fever",
@@ -59,40 +69,42 @@ def demo_fever():
     if "result" in result:
         data = result["result"]
         
-        print(f"\n📊 TRIAGE: {data.get('triage_level', 'unknown').upper()}")
-        print(f"🎯 CONDITION: {data.get('condition', 'unknown').title()}")
+        lines.append(f"\n📊 TRIAGE: {data.get('triage_level', 'unknown').upper()}")
+        lines.append(f"🎯 CONDITION: {data.get('condition', 'unknown').title()}")
         
         # Medicine suggestion
         if "medicine_suggestion" in data:
             med = data["medicine_suggestion"]
-            print(f"\n💊 RECOMMENDED MEDICINE:")
-            print(f"   • {med.get('medicine', 'N/A')}")
-            print(f"   • Dose: {med.get('dose', 'N/A')}")
-            print(f"   • Max daily: {med.get('max_daily', 'N/A')}")
-            print(f"   • Warning: {med.get('warning', 'N/A')}")
+            lines.append(f"\n💊 RECOMMENDED MEDICINE:")
+            lines.append(f"   • {med.get('medicine', 'N/A')}")
+            lines.append(f"   • Dose: {med.get('dose', 'N/A')}")
+            lines.append(f"   • Max daily: {med.get('max_daily', 'N/A')}")
+            lines.append(f"   • Warning: {med.get('warning', 'N/A')}")
         
         # Home remedies
-        print(f"\n🏠 HOME REMEDIES:")
+        lines.append(f"\n🏠 HOME REMEDIES:")
         for i, remedy in enumerate(data.get("home_remedies", [])[:3], 1):
-            print(f"   {i}. {remedy}")
+            lines.append(f"   {i}. {remedy}")
         
         # Warning signs
-        print(f"\n⚠️ WARNING SIGNS:")
+        lines.append(f"\n⚠️ WARNING SIGNS:")
         for warning in data.get("warning_signs", []):
-            print(f"   • {warning}")
+            lines.append(f"   • {warning}")
         
-        print(f"\n📋 FOLLOW-UP: {data.get('follow_up', 'N/A')}")
+        lines.append(f"\n📋 FOLLOW-UP: {data.get('follow_up', 'N/A')}")
         
         # Show mode
         if "llm_error" in data:
-            print(f"\n🤖 MODE: Fallback (hardcoded responses)")
+            lines.append(f"\n🤖 MODE: Fallback (hardcoded responses)")
         else:
-            print(f"\n🤖 MODE: LLM-Powered (dynamic responses)")
+            lines.append(f"\n🤖 MODE: LLM-Powered (dynamic responses)")
         
-        print(f"\n📝 DISCLAIMER: {data.get('disclaimer', 'N/A')}")
+        lines.append(f"\n📝 DISCLAIMER: {data.get('disclaimer', 'N/A')}")
         
     else:
-        print(f"❌ Error: {result.get('error', 'Unknown error')}")
+        lines.append(f"❌ Error: {result.get('error', 'Unknown error')}")
+
+    emit_lines(lines)
 
 if __name__ == "__main__":
     print("🏥 Medical Assistant MCP Server - Demo")
@@ -102,7 +114,7 @@ if __name__ == "__main__":
     
     try:
         # Test server
-        health = requests.get("http://localhost:8000/health", timeout=5)
+        health = session.get("http://localhost:8000/health", timeout=5)
         if health.status_code == 200:
             print("✅ Server running!")
             demo_fever()
@@ -6,26 +6,48 @@ Simple medical guidance for Puch.ai Hackathon 2025
 Start here: Basic MCP server with essential medical tools
 """
 
-import json
+import asyncio
+import fcntl
 import os
+import re
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from itertools import count
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+import orjson
 import uvicorn
 import requests
 from dotenv import load_dotenv
 
+from config import DATA_DIR, SESSIONS_FILE, get_settings
+
+try:
+    import ahocorasick  # Optional C extension (pip install pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
 # Load environment variables
 load_dotenv()
 
+S = get_settings()
+
 # Simple MCP structure (no complex dependencies for MVP)
 app = FastAPI(
     title="Medical Assistant MCP Server - MVP",
     description="Simple medical guidance through MCP",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    # ENV=prod drops Swagger/ReDoc and the OpenAPI schema entirely
+    docs_url=None if S.PROD else "/docs",
+    redoc_url=None if S.PROD else "/redoc",
+    openapi_url=None if S.PROD else "/openapi.json"
 )
 
 # Enable CORS for Puch.ai integration
@@ -86,19 +108,132 @@ HOME_REMEDIES = {
     ]
 }
 
+MEDICINE_DISCLAIMER = "Only use as directed. Consult pharmacist if unsure."
+
+# Freeze the tables so handlers can return them directly without copying
+BASIC_MEDICINES = MappingProxyType(
+    {key: MappingProxyType(info) for key, info in BASIC_MEDICINES.items()})
+HOME_REMEDIES = MappingProxyType(
+    {key: tuple(remedies) for key, remedies in HOME_REMEDIES.items()})
+MEDICINES_WITH_DISCLAIMER = MappingProxyType({
+    key: MappingProxyType({**info, "disclaimer": MEDICINE_DISCLAIMER})
+    for key, info in BASIC_MEDICINES.items()
+})
+
 EMERGENCY_KEYWORDS = [
     "chest pain", "difficulty breathing", "unconscious",
     "severe bleeding", "stroke", "heart attack", "poisoning",
     "severe headache", "high fever above 103", "seizure"
 ]
 
-# --- BASIC DATA MODELS ---
+# Single-word emergency triggers, checked by token before the full scan
+EMERGENCY_WORDS = frozenset(
+    keyword for keyword in EMERGENCY_KEYWORDS if " " not in keyword)
+WORD_RE = re.compile(r"\w+")
+
+# Triage keywords per condition, in priority order
+TRIAGE_KEYWORDS = {
+    "fever": ["fever", "temperature"],
+    "headache": ["headache", "head pain"],
+    "cough": ["cough", "coughing"],
+    "cold": ["cold", "runny nose", "sore throat"]
+}
+
+
+def build_keyword_matcher(tags: Dict[str, tuple]):
+    """Build a single-pass matcher returning the tags of every keyword found in a text"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword, tag in tags.items():
+            automaton.add_word(keyword, tag)
+        automaton.make_automaton()
+        return lambda text: {tag for _, tag in automaton.iter(text)}
+
+    # Fallback: one compiled alternation, lookahead so overlapping keywords all match
+    alternation = "|".join(
+        sorted(map(re.escape, tags), key=len, reverse=True))
+    pattern = re.compile(f"(?=({alternation}))")
+    return lambda text: {tags[keyword] for keyword in pattern.findall(text)}
+
+
+SYMPTOM_KEYWORD_TAGS = {keyword: ("emergency", keyword)
+                        for keyword in EMERGENCY_KEYWORDS}
+for condition, words in TRIAGE_KEYWORDS.items():
+    for word in words:
+        SYMPTOM_KEYWORD_TAGS.setdefault(word, (condition, word))
+
+match_symptoms = build_keyword_matcher(SYMPTOM_KEYWORD_TAGS)
+
+# Condition aliases for medicine lookup, in priority order
+MEDICINE_KEYWORDS = {
+    "fever": ["fever", "temperature"],
+    "headache": ["headache", "head pain"],
+    "pain": ["pain", "ache"]
+}
+
+CONDITION_ALIAS = {alias: key for key, aliases in MEDICINE_KEYWORDS.items()
+                   for alias in aliases}
+
+match_medicine_condition = build_keyword_matcher(CONDITION_ALIAS)
+match_remedy_condition = build_keyword_matcher(
+    {key: key for key in HOME_REMEDIES})
+
+# Canonical phrasings for the semantic cache, mapped to a triage key
+SEMANTIC_PHRASES = {
+    "fever": ("fever", "routine"),
+    "feeling hot with high body temperature": ("fever", "routine"),
+    "headache": ("headache", "self_care"),
+    "cough": ("cough", "self_care"),
+    "cold": ("cold", "self_care"),
+    "blocked nose and sneezing": ("cold", "self_care"),
+    "chest pain": ("emergency", "emergency"),
+    "difficulty breathing": ("emergency", "emergency"),
+    "fainted and not responding": ("emergency", "emergency"),
+    "seizure": ("emergency", "emergency")
+}
+
+
+class SemanticCache:
+    """Map paraphrased symptoms to the closest canonical phrase"""
+
+    def __init__(self, phrases: Dict[str, Tuple[str, str]], model_name: str,
+                 threshold: float):
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.keys = list(phrases.values())
+        self.threshold = threshold
+
+        # Normalized embeddings make inner product equal cosine similarity
+        embeddings = self.model.encode(
+            list(phrases), normalize_embeddings=True)
+        self.index = faiss.IndexFlatIP(embeddings.shape[1])
+        self.index.add(embeddings)
+
+    def lookup(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return the triage key of the closest phrase, if similar enough"""
+        embedding = self.model.encode([text], normalize_embeddings=True)
+        scores, ids = self.index.search(embedding, 1)
+        if scores[0][0] >= self.threshold:
+            return self.keys[ids[0][0]]
+        return None
+
 
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Load the semantic cache once, or None when disabled/unavailable"""
+    if not S.SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        return SemanticCache(
+            SEMANTIC_PHRASES, S.SEMANTIC_MODEL, S.SEMANTIC_THRESHOLD)
+    except Exception as e:
+        # Cached like a success, so a failed load is not retried per request
+        print(f"Semantic cache disabled: {e}")
+        return None
 
-class MCPRequest(BaseModel):
-    method: str
-    params: Optional[Dict[str, Any]] = None
-    id: Optional[str] = None
+# --- BASIC DATA MODELS ---
 
 
 class HealthResponse(BaseModel):
@@ -109,99 +244,127 @@ class HealthResponse(BaseModel):
 # --- SIMPLE MEDICAL LOGIC ---
 
 
-def analyze_symptoms_simple(symptoms: str, age: str = "adult") -> Dict[str, Any]:
-    """Simple symptom analysis - MVP version"""
-    symptoms_lower = symptoms.lower()
-
-    # Emergency check first
-    for keyword in EMERGENCY_KEYWORDS:
-        if keyword in symptoms_lower:
-            return {
-                "triage_level": "emergency",
-                "message": "🚨 EMERGENCY: Call 102/108 immediately or visit nearest hospital",
-                "action": "seek_immediate_help",
-                "disclaimer": "This is an emergency. Get professional medical help immediately."
-            }
+def classify_symptoms(symptoms: str) -> Tuple[str, str]:
+    """Classify symptoms into a (condition, triage_level) pair"""
+    return classify_normalized_symptoms(symptoms.strip().lower())
+
+
+@lru_cache(maxsize=512)
+def classify_normalized_symptoms(symptoms_lower: str) -> Tuple[str, str]:
+    """Cached classification of stripped, lowercased symptoms"""
+    # Emergency check first: whole-word hits are a set lookup per token
+    if not EMERGENCY_WORDS.isdisjoint(WORD_RE.findall(symptoms_lower)):
+        return "emergency", "emergency"
+
+    # Phrases and inflected forms ("seizures") still need the full scan
+    matched = {category for category, _ in match_symptoms(symptoms_lower)}
+    if "emergency" in matched:
+        return "emergency", "emergency"
 
     # Basic triage logic
-    if any(word in symptoms_lower for word in ["fever", "temperature"]):
-        condition = "fever"
+    condition = next(
+        (name for name in TRIAGE_KEYWORDS if name in matched), "general")
+
+    # Paraphrases the keywords miss fall back to the semantic cache
+    if condition == "general" and symptoms_lower:
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is not None:
+            key = semantic_cache.lookup(symptoms_lower)
+            if key is not None:
+                return key
+
+    if condition == "fever":
         triage = "self_care" if "mild" in symptoms_lower else "routine"
-    elif any(word in symptoms_lower for word in ["headache", "head pain"]):
-        condition = "headache"
-        triage = "self_care"
-    elif any(word in symptoms_lower for word in ["cough", "coughing"]):
-        condition = "cough"
-        triage = "self_care"
-    elif any(word in symptoms_lower for word in ["cold", "runny nose", "sore throat"]):
-        condition = "cold"
-        triage = "self_care"
-    else:
-        condition = "general"
+    elif condition == "general":
         triage = "routine"
+    else:
+        triage = "self_care"
+    return condition, triage
 
-    # Get suggestions
-    medicine_info = BASIC_MEDICINES.get(condition, {})
-    remedies = HOME_REMEDIES.get(
-        condition, ["Rest", "Stay hydrated", "Monitor symptoms"])
 
-    return {
+def build_triage_response(condition: str, triage: str) -> MappingProxyType:
+    """Build the frozen analyze_symptoms response for a condition"""
+    return MappingProxyType({
         "triage_level": triage,
         "condition": condition,
-        "medicine_suggestion": medicine_info,
-        "home_remedies": remedies,
+        "medicine_suggestion": BASIC_MEDICINES.get(condition, MappingProxyType({})),
+        "home_remedies": HOME_REMEDIES.get(
+            condition, ("Rest", "Stay hydrated", "Monitor symptoms")),
         "follow_up": "See a doctor if symptoms worsen or persist beyond 3 days",
         "disclaimer": "This is informational only. Consult a healthcare professional for medical advice."
-    }
+    })
+
+
+# Every analyze_symptoms outcome is static, so build the responses once
+TRIAGE_RESPONSES = {
+    ("emergency", "emergency"): MappingProxyType({
+        "triage_level": "emergency",
+        "message": "🚨 EMERGENCY: Call 102/108 immediately or visit nearest hospital",
+        "action": "seek_immediate_help",
+        "disclaimer": "This is an emergency. Get professional medical help immediately."
+    }),
+    **{key: build_triage_response(*key) for key in [
+        ("fever", "self_care"), ("fever", "routine"),
+        ("headache", "self_care"), ("cough", "self_care"),
+        ("cold", "self_care"), ("general", "routine")
+    ]}
+}
+TRIAGE_RESPONSE_JSON = {key: orjson.dumps(response, default=dict)
+                        for key, response in TRIAGE_RESPONSES.items()}
+
+
+def analyze_symptoms_simple(symptoms: str, age: str = "adult") -> Dict[str, Any]:
+    """Simple symptom analysis - MVP version"""
+    return TRIAGE_RESPONSES[classify_symptoms(symptoms)]
 
 
 def get_medicine_suggestion(condition: str) -> Dict[str, Any]:
     """Get OTC medicine suggestion"""
-    condition_lower = condition.lower()
-
-    # Map common terms to our medicine database
-    if any(word in condition_lower for word in ["fever", "temperature"]):
-        key = "fever"
-    elif any(word in condition_lower for word in ["headache", "head pain"]):
-        key = "headache"
-    elif any(word in condition_lower for word in ["pain", "ache"]):
-        key = "pain"
-    else:
+    key = find_medicine_key(condition.strip().lower())
+    if key is None:
         return {
             "message": "Please consult a pharmacist for specific medicine recommendations",
             "general_advice": "Only use medicines as directed on the package",
             "disclaimer": "This tool only suggests common OTC medicines for basic symptoms"
         }
 
-    medicine_info = BASIC_MEDICINES.get(key, {})
-    medicine_info["disclaimer"] = "Only use as directed. Consult pharmacist if unsure."
-    return medicine_info
+    return MEDICINES_WITH_DISCLAIMER[key]
 
 
-def get_home_remedies_simple(condition: str) -> Dict[str, Any]:
-    """Get home remedies for condition"""
-    condition_lower = condition.lower()
+@lru_cache(maxsize=512)
+def find_medicine_key(condition_lower: str) -> Optional[str]:
+    """Map a normalized condition to our medicine database key"""
+    key = CONDITION_ALIAS.get(condition_lower)
+    if key is None:
+        matched = match_medicine_condition(condition_lower)
+        key = next(
+            (name for name in MEDICINE_KEYWORDS if name in matched), None)
+    return key
 
-    # Find matching remedies
-    remedies = []
-    for key, remedy_list in HOME_REMEDIES.items():
-        if key in condition_lower:
-            remedies.extend(remedy_list)
-
-    if not remedies:
-        remedies = [
-            "Rest and stay hydrated",
-            "Monitor your symptoms",
-            "Seek medical advice if symptoms worsen"
-        ]
 
+def get_home_remedies_simple(condition: str) -> Dict[str, Any]:
+    """Get home remedies for condition"""
     return {
         "condition": condition,
-        "remedies": remedies,
+        "remedies": find_remedies(condition.strip().lower()),
         "disclaimer": "Home remedies are not a substitute for professional medical advice",
         "warning": "Seek medical help if symptoms are severe or worsen"
     }
 
+
+@lru_cache(maxsize=512)
+def find_remedies(condition_lower: str) -> Tuple[str, ...]:
+    """Find home remedies matching a normalized condition"""
+    matched = match_remedy_condition(condition_lower)
+    remedies = tuple(remedy for key, remedy_list in HOME_REMEDIES.items()
+                     if key in matched for remedy in remedy_list)
+
+    return remedies or (
+        "Rest and stay hydrated",
+        "Monitor your symptoms",
+        "Seek medical advice if symptoms worsen"
+    )
+
 # --- API ENDPOINTS ---
 
 
@@ -239,107 +402,250 @@ async def test_endpoint():
     }
 
 
+# MCP discovery - available tools
+LIST_TOOLS = {
+    "tools": [
+        {
+            "name": "analyze_symptoms",
+            "description": "Analyze symptoms and provide basic triage",
+            "parameters": {"symptoms": "string", "age": "string (optional)"}
+        },
+        {
+            "name": "suggest_medicine",
+            "description": "Suggest safe OTC medicines",
+            "parameters": {"condition": "string"}
+        },
+        {
+            "name": "get_remedies",
+            "description": "Get home remedies for common conditions",
+            "parameters": {"condition": "string"}
+        }
+    ]
+}
+LIST_TOOLS_JSON = orjson.dumps(LIST_TOOLS)
+
+
+def run_mcp_tool(method: str, params: Dict[str, Any]) -> bytes:
+    """Run an MCP tool and return its JSON-encoded result"""
+    if method == "list_tools":
+        # MCP discovery - static, so it is encoded once at import
+        return LIST_TOOLS_JSON
+
+    elif method == "analyze_symptoms":
+        # Serve the pre-serialized result; no encoding work per call
+        symptoms = params.get("symptoms", "")
+        return TRIAGE_RESPONSE_JSON[classify_symptoms(symptoms)]
+
+    elif method == "suggest_medicine":
+        condition = params.get("condition", "")
+        result = get_medicine_suggestion(condition)
+
+    elif method == "get_remedies":
+        condition = params.get("condition", "")
+        result = get_home_remedies_simple(condition)
+
+    else:
+        result = {"error": f"Unknown method: {method}"}
+
+    return orjson.dumps(result, default=dict)
+
+
+def encode_mcp_error(request_id: Any, code: int, message: str) -> bytes:
+    """Encode a JSON-RPC error response"""
+    return orjson.dumps({
+        "id": request_id,
+        "error": {"code": code, "message": message},
+        "jsonrpc": "2.0"
+    })
+
+
+def encode_mcp_call(call: Any) -> bytes:
+    """Validate and handle one MCP call, encoding its JSON-RPC response"""
+    if not isinstance(call, dict):
+        return encode_mcp_error(None, -32600, "Invalid Request")
+
+    request_id = call.get("id")
+    method = call.get("method")
+    params = call.get("params") or {}
+    if not method or not isinstance(method, str):
+        return encode_mcp_error(request_id, -32600, "Method required")
+    if not isinstance(params, dict):
+        return encode_mcp_error(request_id, -32602, "Params must be an object")
+
+    try:
+        result_json = run_mcp_tool(method, params)
+    except Exception as e:
+        return encode_mcp_error(request_id, -32603, str(e))
+
+    return b'{"id":%s,"result":%s,"jsonrpc":"2.0"}' % (
+        orjson.dumps(request_id), result_json)
+
+
+def encode_mcp_payload(payload: Any) -> bytes:
+    """Handle a parsed /mcp body, a single call or a batch"""
+    # Batched calls: {"batch": [{"method": ..., "params": ..., "id": ...}]}
+    batch = payload.get("batch") if isinstance(payload, dict) else None
+    if isinstance(batch, list):
+        return b"[" + b",".join(
+            encode_mcp_call(call) for call in batch) + b"]"
+    return encode_mcp_call(payload)
+
+
 @app.post("/mcp")
-async def mcp_endpoint(request: MCPRequest):
+async def mcp_endpoint(request: Request):
     """Main MCP interface - handles tool calls from Puch.ai"""
+    # Parse the raw body with orjson; no Pydantic model on the hot path
     try:
-        method = request.method
-        params = request.params or {}
-
-        # Route to appropriate tool
-        if method == "analyze_symptoms":
-            symptoms = params.get("symptoms", "")
-            age = params.get("age", "adult")
-            result = analyze_symptoms_simple(symptoms, age)
-
-        elif method == "suggest_medicine":
-            condition = params.get("condition", "")
-            result = get_medicine_suggestion(condition)
-
-        elif method == "get_remedies":
-            condition = params.get("condition", "")
-            result = get_home_remedies_simple(condition)
-
-        elif method == "list_tools":
-            # MCP discovery - list available tools
-            result = {
-                "tools": [
-                    {
-                        "name": "analyze_symptoms",
-                        "description": "Analyze symptoms and provide basic triage",
-                        "parameters": {"symptoms": "string", "age": "string (optional)"}
-                    },
-                    {
-                        "name": "suggest_medicine",
-                        "description": "Suggest safe OTC medicines",
-                        "parameters": {"condition": "string"}
-                    },
-                    {
-                        "name": "get_remedies",
-                        "description": "Get home remedies for common conditions",
-                        "parameters": {"condition": "string"}
-                    }
-                ]
-            }
-
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        body = encode_mcp_error(None, -32700, "Parse error")
+    else:
+        log_mcp_calls(payload)
+        if S.SEMANTIC_CACHE_ENABLED:
+            # Embedding lookups block, so keep them off the event loop
+            body = await asyncio.get_running_loop().run_in_executor(
+                None, encode_mcp_payload, payload)
         else:
-            result = {"error": f"Unknown method: {method}"}
+            body = encode_mcp_payload(payload)
 
-        return {
-            "id": request.id,
-            "result": result,
-            "jsonrpc": "2.0"
-        }
+    return Response(content=body, media_type="application/json")
 
-    except Exception as e:
-        return {
-            "id": request.id,
-            "error": {"code": -32603, "message": str(e)},
-            "jsonrpc": "2.0"
-        }
+@app.on_event("startup")
+async def warm_caches():
+    """Warm lookup caches and load optional models before the first request"""
+    for symptoms in TRIAGE_KEYWORDS:
+        classify_symptoms(symptoms)
+    for condition in MEDICINE_KEYWORDS:
+        get_medicine_suggestion(condition)
+    for condition in HOME_REMEDIES:
+        get_home_remedies_simple(condition)
+
+    # Model loading blocks, so keep it off the event loop
+    if S.SEMANTIC_CACHE_ENABLED:
+        await asyncio.get_running_loop().run_in_executor(None, get_semantic_cache)
 
 # --- SIMPLE LOGGING ---
 
 
-def log_session(session_data: Dict[str, Any]):
-    """Simple session logging to JSON file"""
-    try:
-        log_file = "data/sessions.json"
-        os.makedirs("data", exist_ok=True)
+MAX_SESSIONS_PER_FILE = 100
+# Longest shutdown waits for queued sessions to be written (seconds)
+SESSION_FLUSH_TIMEOUT = 5
 
-        # Load existing logs
-        if os.path.exists(log_file):
-            with open(log_file, "r") as f:
-                logs = json.load(f)
-        else:
-            logs = []
+# Created on startup so it belongs to the server's event loop
+session_queue: Optional[asyncio.Queue] = None
+session_writer: Optional[asyncio.Task] = None
 
-        # Add new session
-        session_data["timestamp"] = datetime.now().isoformat()
-        logs.append(session_data)
 
-        # Keep only last 100 sessions (simple cleanup)
-        logs = logs[-100:]
+def log_mcp_calls(payload: Any):
+    """Queue a session for each well-formed tool call in a /mcp body"""
+    batch = payload.get("batch") if isinstance(payload, dict) else None
+    for call in batch if isinstance(batch, list) else (payload,):
+        if isinstance(call, dict) and call.get("method") and isinstance(call["method"], str):
+            log_session({"type": call["method"], "input": call.get("params") or {}})
 
-        # Save back
-        with open(log_file, "w") as f:
-            json.dump(logs, f, indent=2)
 
-    except Exception as e:
-        print(f"Logging error: {e}")
+def log_session(session_data: Dict[str, Any]):
+    """Queue a session for the background log writer (never blocks)"""
+    session_data["timestamp"] = datetime.now().isoformat()
+    if session_queue is None:
+        print("Logging error: session log writer is not running")
+        return
+    session_queue.put_nowait(session_data)
+
+
+def claim_sessions_file() -> Tuple[str, int]:
+    """Pick this worker's session log: the lowest slot no live worker holds
+
+    Returns (data/sessions.<slot>.jsonl, fd holding the slot's lock). Each
+    worker rotates on its own line count, so workers never share a file,
+    and slots are reused across restarts so the file count stays bounded.
+    """
+    root, ext = os.path.splitext(SESSIONS_FILE)
+    for slot in count():
+        lock_fd = os.open(f"{root}.{slot}.lock", os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            continue
+        return f"{root}.{slot}{ext}", lock_fd
+
+
+def open_sessions_file(path: str) -> int:
+    """Open a session log for appending"""
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+async def write_session_logs():
+    """Append queued sessions to a JSON-lines file, one write per session"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path, lock_fd = claim_sessions_file()
+    with open(path, "ab+") as f:
+        f.seek(0)
+        lines = sum(1 for _ in f)
+
+    fd = open_sessions_file(path)
+    try:
+        while True:
+            session_data = await session_queue.get()
+            try:
+                os.write(fd, orjson.dumps(session_data, default=dict) + b"\n")
+                lines += 1
+
+                # Rotate instead of rewriting: keeps the last 100-200 sessions
+                if lines >= MAX_SESSIONS_PER_FILE:
+                    os.close(fd)
+                    os.replace(path, path + ".1")
+                    fd = open_sessions_file(path)
+                    lines = 0
+            except Exception as e:
+                print(f"Logging error: {e}")
+            finally:
+                session_queue.task_done()
+    finally:
+        os.close(fd)
+        # Closing the lock frees the slot for the next worker
+        os.close(lock_fd)
+
+
+@app.on_event("startup")
+async def start_session_logging():
+    """Start the background session log writer"""
+    global session_queue, session_writer
+    session_queue = asyncio.Queue()
+    session_writer = asyncio.create_task(write_session_logs())
+
+
+@app.on_event("shutdown")
+async def stop_session_logging():
+    """Flush pending sessions and stop the log writer"""
+    if session_writer is None:
+        return
+    # Stop waiting if the writer has died: nothing would drain the queue
+    drained = asyncio.ensure_future(session_queue.join())
+    await asyncio.wait({drained, session_writer},
+                       timeout=SESSION_FLUSH_TIMEOUT,
+                       return_when=asyncio.FIRST_COMPLETED)
+    drained.cancel()
+    session_writer.cancel()
 
 
 if __name__ == "__main__":
     print("🏥 Starting Medical Assistant MCP Server - MVP")
-    print("📍 Access at: http://localhost:8000")
-    print("🔍 Health check: http://localhost:8000/health")
-    print("🧪 Test endpoint: http://localhost:8000/test")
-    print("⚡ MCP endpoint: http://localhost:8000/mcp")
+    print(f"📍 Access at: http://localhost:{S.PORT}")
+    print(f"🔍 Health check: http://localhost:{S.PORT}/health")
+    print(f"🧪 Test endpoint: http://localhost:{S.PORT}/test")
+    print(f"⚡ MCP endpoint: http://localhost:{S.PORT}/mcp")
 
+    # DEV=1 enables autoreload, which only works with a single worker
     uvicorn.run(
         "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
+        host=S.HOST,
+        port=S.PORT,
+        reload=S.DEV,
+        workers=None if S.DEV else S.WEB_CONCURRENCY,
+        loop="uvloop",
+        http="httptools",
+        log_level="info" if S.DEV else "warning",
+        access_log=S.DEV
     )
@@ -6,13 +6,39 @@ Simple medical guidance - No complex dependencies
 Built for Puch.ai Hackathon 2025
 """
 
+import asyncio
 import json
 import os
+import re
+import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+import googlemaps
+import orjson
 import requests
 from dotenv import load_dotenv
 
+try:
+    import ahocorasick  # Optional C extension (pip install pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan  # Optional SIMD matcher (pip install hyperscan)
+except ImportError:
+    hyperscan = None
+
+try:
+    import aiohttp  # Optional, for non-blocking chemist lookups
+except ImportError:
+    aiohttp = None
+
 # Load environment variables
 load_dotenv()
 
@@ -93,6 +119,325 @@ EMERGENCY_KEYWORDS = [
     "severe abdominal pain", "severe vomiting", "blood in vomit",
     "blood in stool", "severe diarrhea", "dehydration signs"
 ]
+# Multi-word literals are not interned by the compiler, unlike the
+# identifier-like table keys; intern them so keyword lookups hit by identity
+EMERGENCY_KEYWORDS = [sys.intern(keyword) for keyword in EMERGENCY_KEYWORDS]
+
+# Condition keywords, in priority order
+CONDITION_KEYWORDS = {
+    "fever": ["fever", "temperature", "hot", "burning"],
+    "headache": ["headache", "head pain", "migraine"],
+    "cough": ["cough", "coughing"],
+    "cold": ["cold", "runny nose", "sore throat", "sneezing"],
+    "stomach_upset": ["stomach", "nausea", "vomiting", "diarrhea"],
+    "pain": ["pain", "ache", "hurt"]
+}
+
+# Severity modifiers, in priority order
+SEVERITY_KEYWORDS = {
+    "urgent": ["severe", "extreme", "unbearable", "intense"],
+    "routine": ["high fever", "103", "persistent", "worsening"]
+}
+
+# Condition description -> BASIC_MEDICINES key, in priority order
+MEDICINE_KEYWORDS = {
+    "fever": ["fever", "temperature"],
+    "headache": ["headache", "head pain"],
+    "pain": ["pain", "ache"],
+    "cold": ["cold", "cough"]
+}
+
+
+def build_keyword_matcher(tagged_keywords: Iterable[Tuple[str, Tuple[str, str]]]):
+    """Build a one-pass matcher returning the set of tags found in a text.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, then a
+    Hyperscan database, else a single compiled regex. All of them report
+    overlapping matches, like `in`.
+    """
+    tags: Dict[str, List[Tuple[str, str]]] = {}
+    for keyword, tag in tagged_keywords:
+        tags.setdefault(keyword, []).append(tag)
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword, keyword_tags in tags.items():
+            automaton.add_word(keyword, tuple(keyword_tags))
+        automaton.make_automaton()
+        return lambda text: {tag for _, found in automaton.iter(text) for tag in found}
+
+    if hyperscan is not None:
+        keywords = list(tags)
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[re.escape(keyword).encode() for keyword in keywords],
+            ids=list(range(len(keywords))),
+            elements=len(keywords),
+            # Report each keyword once per scan
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords),
+        )
+        # Scratch space must not be shared between concurrent scans
+        local = threading.local()
+
+        def match(text: str) -> Set[Tuple[str, str]]:
+            scratch = getattr(local, "scratch", None)
+            if scratch is None:
+                scratch = local.scratch = hyperscan.Scratch(database)
+            found: Set[Tuple[str, str]] = set()
+            database.scan(
+                text.encode(),
+                match_event_handler=lambda index, *_: found.update(tags[keywords[index]]),
+                scratch=scratch)
+            return found
+        return match
+
+    alternation = "|".join(sorted(map(re.escape, tags), key=len, reverse=True))
+    # Lookahead keeps overlapping matches; findall collects them in C
+    pattern = re.compile(f"(?=({alternation}))")
+    # The alternation reports only the longest keyword at each position.
+    # Any shorter keyword matching there is a prefix of it, so add its tags.
+    prefix_tags = {keyword: {tag for other in tags if keyword.startswith(other)
+                             for tag in tags[other]}
+                   for keyword in tags}
+    return lambda text: {tag for keyword in set(pattern.findall(text)) for tag in prefix_tags[keyword]}
+
+
+def _tagged(kind_keywords: Dict[str, List[str]], kind: str) -> Iterable[Tuple[str, Tuple[str, str]]]:
+    """Pair each keyword with a (kind, name) tag"""
+    return ((word, (kind, name)) for name, words in kind_keywords.items() for word in words)
+
+
+# Emergencies, conditions and severity modifiers found in one scan
+match_symptoms = build_keyword_matcher([
+    *((keyword, ("emergency", keyword)) for keyword in EMERGENCY_KEYWORDS),
+    *_tagged(CONDITION_KEYWORDS, "condition"),
+    *_tagged(SEVERITY_KEYWORDS, "severity"),
+])
+match_medicine_condition = build_keyword_matcher(
+    _tagged(MEDICINE_KEYWORDS, "medicine"))
+EMERGENCY_RANK = {keyword: i for i, keyword in enumerate(EMERGENCY_KEYWORDS)}
+
+
+@lru_cache(maxsize=256)
+def _analyze_cached(symptoms_lower: str) -> Tuple[Tuple[str, ...], str, str]:
+    """Scan symptoms once for (red flags by priority, condition, triage level)"""
+    hits = match_symptoms(symptoms_lower)
+    detected_emergencies = tuple(sorted(
+        (keyword for kind, keyword in hits if kind == "emergency"),
+        key=EMERGENCY_RANK.__getitem__))
+    condition = next((condition for condition in CONDITION_KEYWORDS
+                      if ("condition", condition) in hits), "general")
+    triage_level = next((level for level in SEVERITY_KEYWORDS
+                         if ("severity", level) in hits), "self_care")
+    return detected_emergencies, condition, triage_level
+
+# Remedy categories match on their key or any word of it ("stomach_upset")
+match_remedy_condition = build_keyword_matcher(
+    (word, ("remedy", key))
+    for key in HOME_REMEDIES for word in {key, *key.split("_")})
+GENERAL_REMEDIES = (
+    "Rest and stay hydrated with plenty of fluids",
+    "Monitor your symptoms carefully",
+    "Seek medical advice if symptoms worsen or persist",
+    "Maintain good hygiene and nutrition",
+)
+
+
+@lru_cache(maxsize=1024)
+def find_home_remedies(condition_lower: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Return matched remedy categories and their deduplicated remedies"""
+    found = {key for _, key in match_remedy_condition(condition_lower)}
+    matched_conditions = tuple(key for key in HOME_REMEDIES if key in found)
+    if not matched_conditions:
+        return ("general",), GENERAL_REMEDIES
+    unique_remedies = tuple(dict.fromkeys(
+        remedy for key in matched_conditions for remedy in HOME_REMEDIES[key]))
+    return matched_conditions, unique_remedies
+
+
+@lru_cache(maxsize=1024)
+def find_medicine_key(condition_lower: str) -> str:
+    """Map condition description to medicine database key"""
+    hits = match_medicine_condition(condition_lower)
+    return next((key for key in MEDICINE_KEYWORDS
+                 if ("medicine", key) in hits), "")
+
+
+# --- STATIC RESPONSE TABLES ---
+# Emoji-bearing texts shared by many responses; one interned object each
+EMERGENCY_MESSAGE = sys.intern("🚨 EMERGENCY DETECTED: Call 102/108 immediately or visit nearest hospital")
+ANALYSIS_DISCLAIMER = sys.intern("⚠️ This is informational only. Consult a healthcare professional for medical advice.")
+MEDICINE_DISCLAIMER = sys.intern("⚠️ Only use as directed. Consult pharmacist if unsure. Not for prescription medicines.")
+REMEDY_DISCLAIMER = sys.intern("🏠 Home remedies are supportive care only. Not a substitute for professional medical advice")
+REMEDY_WARNING = sys.intern("⚠️ Seek medical help if symptoms are severe or worsen")
+REMEDY_TIPS = (
+    "Home remedies work best alongside proper rest",
+    "Stay hydrated throughout treatment",
+    "If symptoms worsen, seek medical help",
+)
+
+EMERGENCY_RESPONSE_BASE = MappingProxyType({
+    "triage_level": "emergency",
+    "message": EMERGENCY_MESSAGE,
+    "action": "seek_immediate_help",
+    "emergency_contacts": MappingProxyType({
+        "ambulance": "102 / 108",
+        "police": "100",
+        "fire": "101"
+    }),
+    "disclaimer": "This is a medical emergency. Get professional medical help immediately."
+})
+
+FOLLOW_UP_DEFAULT = "Consult healthcare professional if concerned"
+FOLLOW_UP_ADVICE = MappingProxyType({
+    "emergency": "Seek immediate medical attention",
+    "urgent": "See a doctor within 24 hours",
+    "routine": "Schedule appointment with doctor within 1-2 weeks if symptoms persist",
+    "self_care": "Monitor symptoms. See doctor if they worsen or persist beyond 3-5 days"
+})
+
+# suggest_medicine payload per BASIC_MEDICINES key, minus the condition
+MEDICINE_TEMPLATES = MappingProxyType({
+    key: MappingProxyType({
+        "recommended_medicine": info.get("medicine", ""),
+        "dosage": info.get("dose", ""),
+        "frequency": info.get("frequency", "As needed"),
+        "max_daily": info.get("max_daily", ""),
+        "warnings": (info.get("warning", ""),) + (
+            (info["age_restriction"],) if "age_restriction" in info else ()),
+        "disclaimer": MEDICINE_DISCLAIMER,
+    })
+    for key, info in BASIC_MEDICINES.items()
+})
+
+MEDICINE_NOT_FOUND = MappingProxyType({
+    "message": "Please consult a pharmacist for specific medicine recommendations",
+    "general_advice": "Only use medicines as directed on the package",
+    "common_otc": "Paracetamol for fever/pain, ORS for dehydration",
+    "disclaimer": "This tool only suggests common OTC medicines for basic symptoms",
+})
+
+WARNING_SIGNS = MappingProxyType({
+    "fever": ("Temperature above 103°F (39.4°C)", "Persistent fever beyond 3 days", "Difficulty breathing"),
+    "headache": ("Sudden severe headache", "Headache with neck stiffness", "Changes in vision"),
+    "cough": ("Blood in cough", "Difficulty breathing", "Chest pain"),
+    "cold": ("High fever", "Severe throat pain", "Ear pain"),
+    "general": ("Worsening symptoms", "New severe symptoms", "Signs of dehydration")
+})
+
+TOOLS_LIST = MappingProxyType({
+    "tools": (
+        MappingProxyType({
+            "name": "analyze_symptoms",
+            "description": "Analyze symptoms and provide triage recommendations",
+            "parameters": MappingProxyType({
+                "symptoms": "string (required) - Description of symptoms",
+                "age": "string (optional) - Patient age group (child/adult/elderly)"
+            })
+        }),
+        MappingProxyType({
+            "name": "suggest_medicine",
+            "description": "Suggest safe over-the-counter medicines",
+            "parameters": MappingProxyType({
+                "condition": "string (required) - Medical condition or symptoms",
+                "age": "string (optional) - Patient age group"
+            })
+        }),
+        MappingProxyType({
+            "name": "get_remedies",
+            "description": "Get home remedies for common conditions",
+            "parameters": MappingProxyType({
+                "condition": "string (required) - Medical condition"
+            })
+        }),
+        MappingProxyType({
+            "name": "find_chemists",
+            "description": "Find nearby pharmacies/chemists",
+            "parameters": MappingProxyType({
+                "location": "string (required) - Location to search near",
+                "radius_km": "float (optional) - Search radius in kilometers (default: 5.0)"
+            })
+        }),
+        MappingProxyType({
+            "name": "get_session_logs",
+            "description": "Get recent consultation logs",
+            "parameters": MappingProxyType({
+                "limit": "int (optional) - Number of recent sessions (default: 10)"
+            })
+        })
+    )
+})
+
+
+
+@lru_cache(maxsize=256)
+def _static_analysis(condition: str, triage_level: str) -> MappingProxyType:
+    """Rule-based analysis fields that depend only on condition and triage"""
+    return MappingProxyType({
+        "medicine_suggestion": MappingProxyType(BASIC_MEDICINES.get(condition, {})),
+        "home_remedies": tuple(HOME_REMEDIES.get(
+            condition, ["Rest", "Stay hydrated", "Monitor symptoms"])),
+        "follow_up": FOLLOW_UP_ADVICE.get(triage_level, FOLLOW_UP_DEFAULT),
+        "warning_signs": WARNING_SIGNS.get(condition, WARNING_SIGNS["general"]),
+        "disclaimer": ANALYSIS_DISCLAIMER,
+    })
+
+
+# --- PLACES CACHE ---
+PLACES_CACHE_SIZE = 512
+PLACES_CACHE_TTL = 900  # seconds
+
+# (location, radius) -> (expiry, result); oldest entries are evicted first
+_places_cache: Dict[Tuple[Any, float], Tuple[float, Dict[str, Any]]] = {}
+
+
+def _places_cache_key(location: str, radius_km: float) -> Tuple[Any, float]:
+    """Coalesce nearby coordinates and spelling variants of one location"""
+    try:
+        lat, lng = (round(float(part), 3) for part in str(location).split(","))
+        place = (lat, lng)
+    except ValueError:
+        place = str(location).strip().lower()
+    return place, round(float(radius_km), 1)
+
+
+def _get_cached_places(key: Tuple[Any, float]) -> Optional[Dict[str, Any]]:
+    """Return a cached chemist search that has not expired yet"""
+    entry = _places_cache.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+
+def _store_places(key: Tuple[Any, float], result: Dict[str, Any]):
+    """Cache a chemist search, evicting the oldest entries past the limit"""
+    _places_cache.pop(key, None)
+    _places_cache[key] = (time.monotonic() + PLACES_CACHE_TTL, result)
+    while len(_places_cache) > PLACES_CACHE_SIZE:
+        # pop() with a default: another thread may evict the same entry
+        _places_cache.pop(next(iter(_places_cache)), None)
+
+
+PLACES_NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+_aiohttp_session = None
+
+
+async def _get_aiohttp_session():
+    """Shared aiohttp session, created inside the running event loop"""
+    global _aiohttp_session
+    if _aiohttp_session is None or _aiohttp_session.closed:
+        _aiohttp_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5))
+    return _aiohttp_session
+
+
+async def close_aiohttp_session():
+    """Close the shared aiohttp session (call on server shutdown)"""
+    global _aiohttp_session
+    if _aiohttp_session is not None:
+        await _aiohttp_session.close()
+        _aiohttp_session = None
+
 
 # --- LLM CLIENT (Gemini API) ---
 
@@ -221,40 +566,31 @@ JSON response:"""
 
 class MedicalMCPServer:
     def __init__(self):
-        self.sessions = []
+        # Oldest sessions drop off automatically past 100
+        self.sessions = deque(maxlen=100)
         self.google_api_key = os.getenv("GOOGLE_PLACES_API_KEY")
         self.llm = LLMClient()
+        # Places client is built on first use and keeps its connections alive
+        self._gmaps = None
+        self._http_session = requests.Session()
 
-    def analyze_symptoms(self, symptoms: str, age: str = "adult", location: str = None) -> Dict[str, Any]:
+    def analyze_symptoms(self, symptoms: str, age: str = "adult") -> Dict[str, Any]:
         """Analyze symptoms and provide triage recommendations"""
-        symptoms_lower = symptoms.lower()
+        # Collapse whitespace so trivially different inputs share cache entries.
+        # This also lets keywords match across line breaks and double spaces
+        # ("chest\npain"), which only ever adds red flags.
+        detected_emergencies, condition, rule_triage_level = _analyze_cached(
+            " ".join(symptoms.lower().split()))
 
         # Emergency check first
-        detected_emergencies = []
-        for keyword in EMERGENCY_KEYWORDS:
-            if keyword in symptoms_lower:
-                detected_emergencies.append(keyword)
-
         if detected_emergencies:
-            return {
-                "triage_level": "emergency",
-                "message": "🚨 EMERGENCY DETECTED: Call 102/108 immediately or visit nearest hospital",
-                "action": "seek_immediate_help",
-                "detected_red_flags": detected_emergencies,
-                "emergency_contacts": {
-                    "ambulance": "102 / 108",
-                    "police": "100",
-                    "fire": "101"
-                },
-                "disclaimer": "This is a medical emergency. Get professional medical help immediately."
-            }
+            return {**EMERGENCY_RESPONSE_BASE, "detected_red_flags": list(detected_emergencies)}
 
         # Prefer LLM if configured; fallback to rule-based
         if self.llm.is_enabled():
             try:
                 llm_resp = self.llm.analyze_symptoms(symptoms, age)
-                # Derive condition heuristically for warning signs
-                condition = self._identify_condition(symptoms_lower)
+                # Condition derived heuristically for warning signs
                 triage_level = llm_resp.get("triage_level", "self_care")
                 # Safety post-filtering
                 llm_resp["otc_medicines"] = self._filter_otc_list(
@@ -268,52 +604,31 @@ class MedicalMCPServer:
                     "follow_up": llm_resp.get("follow_up", self._get_follow_up_advice(triage_level)),
                     "warning_signs": llm_resp.get("warning_signs", self._get_warning_signs(condition)),
                     "red_flags": llm_resp.get("red_flags", []),
-                    "disclaimer": "⚠️ This is informational only. Consult a healthcare professional for medical advice."
+                    "disclaimer": ANALYSIS_DISCLAIMER
                 }
             except Exception as e:
                 # Fallback to static logic on LLM failure
-                condition = self._identify_condition(symptoms_lower)
-                triage_level = self._determine_triage_level(
-                    symptoms_lower, condition)
-                medicine_info = BASIC_MEDICINES.get(condition, {})
-                remedies = HOME_REMEDIES.get(
-                    condition, ["Rest", "Stay hydrated", "Monitor symptoms"])
                 result = {
-                    "triage_level": triage_level,
+                    "triage_level": rule_triage_level,
                     "condition": condition,
                     "assessment": f"Based on symptoms: {symptoms}",
-                    "medicine_suggestion": medicine_info,
-                    "home_remedies": remedies,
-                    "follow_up": self._get_follow_up_advice(triage_level),
-                    "warning_signs": self._get_warning_signs(condition),
-                    "disclaimer": "⚠️ This is informational only. Consult a healthcare professional for medical advice.",
+                    **_static_analysis(condition, rule_triage_level),
                     "llm_error": str(e),
                 }
         else:
             # Rule-based
-            condition = self._identify_condition(symptoms_lower)
-            triage_level = self._determine_triage_level(
-                symptoms_lower, condition)
-            medicine_info = BASIC_MEDICINES.get(condition, {})
-            remedies = HOME_REMEDIES.get(
-                condition, ["Rest", "Stay hydrated", "Monitor symptoms"])
             result = {
-                "triage_level": triage_level,
+                "triage_level": rule_triage_level,
                 "condition": condition,
                 "assessment": f"Based on symptoms: {symptoms}",
-                "medicine_suggestion": medicine_info,
-                "home_remedies": remedies,
-                "follow_up": self._get_follow_up_advice(triage_level),
-                "warning_signs": self._get_warning_signs(condition),
-                "disclaimer": "⚠️ This is informational only. Consult a healthcare professional for medical advice.",
+                **_static_analysis(condition, rule_triage_level),
             }
 
         # Log session
         self._log_session({
             "type": "symptom_analysis",
             "input": symptoms,
-            "output": result,
-            "timestamp": datetime.now().isoformat()
+            "output": result
         })
 
         return result
@@ -331,60 +646,26 @@ class MedicalMCPServer:
                     "condition": condition,
                     "medicines": meds,
                     "general_advice": llm_resp.get("general_advice", "Only use medicines as directed on the package"),
-                    "disclaimer": "⚠️ Only use as directed. Consult pharmacist if unsure. Not for prescription medicines.",
+                    "disclaimer": MEDICINE_DISCLAIMER,
                 }
             except Exception as e:
                 # Fallback to static map
-                medicine_key = self._map_condition_to_medicine(condition_lower)
-                medicine_info = BASIC_MEDICINES.get(medicine_key, {})
-                if not medicine_info:
-                    return {
-                        "message": "Please consult a pharmacist for specific medicine recommendations",
-                        "general_advice": "Only use medicines as directed on the package",
-                        "common_otc": "Paracetamol for fever/pain, ORS for dehydration",
-                        "disclaimer": "This tool only suggests common OTC medicines for basic symptoms",
-                        "llm_error": str(e),
-                    }
-                warnings = [medicine_info.get("warning", "")]
-                if "age_restriction" in medicine_info:
-                    warnings.append(medicine_info["age_restriction"])
-                result = {
-                    "condition": condition,
-                    "recommended_medicine": medicine_info.get("medicine", ""),
-                    "dosage": medicine_info.get("dose", ""),
-                    "frequency": medicine_info.get("frequency", "As needed"),
-                    "max_daily": medicine_info.get("max_daily", ""),
-                    "warnings": warnings,
-                    "disclaimer": "⚠️ Only use as directed. Consult pharmacist if unsure. Not for prescription medicines.",
-                }
+                template = MEDICINE_TEMPLATES.get(
+                    find_medicine_key(condition_lower))
+                if template is None:
+                    return {**MEDICINE_NOT_FOUND, "llm_error": str(e)}
+                result = {"condition": condition, **template}
         else:
-            medicine_key = self._map_condition_to_medicine(condition_lower)
-            medicine_info = BASIC_MEDICINES.get(medicine_key, {})
-            if not medicine_info:
-                return {
-                    "message": "Please consult a pharmacist for specific medicine recommendations",
-                    "general_advice": "Only use medicines as directed on the package",
-                    "common_otc": "Paracetamol for fever/pain, ORS for dehydration",
-                    "disclaimer": "This tool only suggests common OTC medicines for basic symptoms",
-                }
-            warnings = [medicine_info.get("warning", "")]
-            if "age_restriction" in medicine_info:
-                warnings.append(medicine_info["age_restriction"])
-            result = {
-                "condition": condition,
-                "recommended_medicine": medicine_info.get("medicine", ""),
-                "dosage": medicine_info.get("dose", ""),
-                "frequency": medicine_info.get("frequency", "As needed"),
-                "max_daily": medicine_info.get("max_daily", ""),
-                "warnings": warnings,
-                "disclaimer": "⚠️ Only use as directed. Consult pharmacist if unsure. Not for prescription medicines.",
-            }
+            template = MEDICINE_TEMPLATES.get(
+                find_medicine_key(condition_lower))
+            if template is None:
+                return MEDICINE_NOT_FOUND
+            result = {"condition": condition, **template}
 
         self._log_session({
             "type": "medicine_suggestion",
             "input": condition,
-            "output": result,
-            "timestamp": datetime.now().isoformat()
+            "output": result
         })
 
         return result
@@ -401,223 +682,205 @@ class MedicalMCPServer:
                     "remedies": llm_resp.get("remedies", []),
                     "general_tips": llm_resp.get("general_tips", []),
                     "warnings": llm_resp.get("warnings", []),
-                    "disclaimer": "🏠 Home remedies are supportive care only. Not a substitute for professional medical advice",
+                    "disclaimer": REMEDY_DISCLAIMER,
                 }
             except Exception as e:
                 # Fallback to static
-                remedies = []
-                matched_conditions = []
-                for key, remedy_list in HOME_REMEDIES.items():
-                    if key in condition_lower or any(word in condition_lower for word in key.split('_')):
-                        remedies.extend(remedy_list)
-                        matched_conditions.append(key)
-                unique_remedies = []
-                for remedy in remedies:
-                    if remedy not in unique_remedies:
-                        unique_remedies.append(remedy)
-                if not unique_remedies:
-                    unique_remedies = [
-                        "Rest and stay hydrated with plenty of fluids",
-                        "Monitor your symptoms carefully",
-                        "Seek medical advice if symptoms worsen or persist",
-                        "Maintain good hygiene and nutrition",
-                    ]
-                    matched_conditions = ["general"]
+                matched_conditions, unique_remedies = find_home_remedies(
+                    condition_lower)
                 result = {
                     "condition": condition,
                     "matched_categories": matched_conditions,
                     "remedies": unique_remedies,
-                    "general_tips": [
-                        "Home remedies work best alongside proper rest",
-                        "Stay hydrated throughout treatment",
-                        "If symptoms worsen, seek medical help",
-                    ],
-                    "disclaimer": "🏠 Home remedies are supportive care only. Not a substitute for professional medical advice",
-                    "warning": "⚠️ Seek medical help if symptoms are severe or worsen",
+                    "general_tips": REMEDY_TIPS,
+                    "disclaimer": REMEDY_DISCLAIMER,
+                    "warning": REMEDY_WARNING,
                     "llm_error": str(e),
                 }
         else:
             # Static flow
-            remedies = []
-            matched_conditions = []
-            for key, remedy_list in HOME_REMEDIES.items():
-                if key in condition_lower or any(word in condition_lower for word in key.split('_')):
-                    remedies.extend(remedy_list)
-                    matched_conditions.append(key)
-            unique_remedies = []
-            for remedy in remedies:
-                if remedy not in unique_remedies:
-                    unique_remedies.append(remedy)
-            if not unique_remedies:
-                unique_remedies = [
-                    "Rest and stay hydrated with plenty of fluids",
-                    "Monitor your symptoms carefully",
-                    "Seek medical advice if symptoms worsen or persist",
-                    "Maintain good hygiene and nutrition",
-                ]
-                matched_conditions = ["general"]
+            matched_conditions, unique_remedies = find_home_remedies(
+                condition_lower)
             result = {
                 "condition": condition,
                 "matched_categories": matched_conditions,
                 "remedies": unique_remedies,
-                "general_tips": [
-                    "Home remedies work best alongside proper rest",
-                    "Stay hydrated throughout treatment",
-                    "If symptoms worsen, seek medical help",
-                ],
-                "disclaimer": "🏠 Home remedies are supportive care only. Not a substitute for professional medical advice",
-                "warning": "⚠️ Seek medical help if symptoms are severe or worsen",
+                "general_tips": REMEDY_TIPS,
+                "disclaimer": REMEDY_DISCLAIMER,
+                "warning": REMEDY_WARNING,
             }
 
         self._log_session({
             "type": "home_remedies",
             "input": condition,
-            "output": result,
-            "timestamp": datetime.now().isoformat()
+            "output": result
         })
 
         return result
 
     def find_nearby_chemists(self, location: str, radius_km: float = 5.0) -> Dict[str, Any]:
         """Find nearby pharmacies using Google Places API"""
-        if not self.google_api_key or self.google_api_key == "your_google_places_api_key_here":
-            return {
-                "error": "Google Places API key not configured",
-                "message": "Please add your Google Places API key to .env file",
-                "manual_search": f"Search for 'pharmacy near {location}' on Google Maps",
-                "common_chains": ["Apollo Pharmacy", "MedPlus", "Netmeds", "1mg", "Guardian Pharmacy"]
-            }
+        if not self._places_configured():
+            return self._places_not_configured(location)
 
         try:
-            # Use Google Places API to find pharmacies
-            import googlemaps
-            gmaps = googlemaps.Client(key=self.google_api_key)
-
-            # Search for pharmacies
-            places_result = gmaps.places_nearby(
-                location=location,
-                radius=radius_km * 1000,  # Convert km to meters
-                type='pharmacy',
-                language='en'
-            )
-
-            chemists = []
-            # Limit to 5 results
-            for place in places_result.get('results', [])[:5]:
-                chemist = {
-                    "name": place.get('name', 'Unknown'),
-                    "address": place.get('vicinity', 'Address not available'),
-                    "rating": place.get('rating', 'Not rated'),
-                    "open_now": place.get('opening_hours', {}).get('open_now', 'Unknown'),
-                    "place_id": place.get('place_id', ''),
-                }
+            cache_key = _places_cache_key(location, radius_km)
+            result = _get_cached_places(cache_key)
+            if result is None:
+                # Use Google Places API to find pharmacies
+                if self._gmaps is None:
+                    self._gmaps = googlemaps.Client(
+                        key=self.google_api_key,
+                        timeout=5,
+                        requests_session=self._http_session
+                    )
+                gmaps = self._gmaps
+
+                # Search for pharmacies
+                places_result = gmaps.places_nearby(
+                    location=location,
+                    radius=radius_km * 1000,  # Convert km to meters
+                    type='pharmacy',
+                    language='en'
+                )
+                result = self._build_chemists_result(
+                    location, radius_km, places_result)
+                _store_places(cache_key, result)
+
+        except Exception as e:
+            result = self._chemist_search_failed(e)
+
+        self._log_session({
+            "type": "chemist_search",
+            "input": location,
+            "output": result
+        })
 
-                # Add Google Maps link
-                if 'geometry' in place:
-                    lat = place['geometry']['location']['lat']
-                    lng = place['geometry']['location']['lng']
-                    chemist['maps_link'] = f"https://maps.google.com/?q={lat},{lng}"
-                    # Would need additional API call
-                    chemist['distance_km'] = "Calculating..."
+        return result
 
-                chemists.append(chemist)
+    async def find_nearby_chemists_async(self, location: str, radius_km: float = 5.0) -> Dict[str, Any]:
+        """Find nearby pharmacies without blocking the event loop"""
+        if aiohttp is None:
+            return await asyncio.to_thread(self.find_nearby_chemists, location, radius_km)
+        if not self._places_configured():
+            return self._places_not_configured(location)
 
-            result = {
-                "location": location,
-                "radius_km": radius_km,
-                "total_found": len(chemists),
-                "chemists": chemists,
-                "search_timestamp": datetime.now().isoformat(),
-                "note": "Call ahead to confirm medicine availability"
-            }
+        try:
+            cache_key = _places_cache_key(location, radius_km)
+            result = _get_cached_places(cache_key)
+            if result is None:
+                session = await _get_aiohttp_session()
+                params = {
+                    "location": googlemaps.convert.latlng(location),
+                    "radius": radius_km * 1000,  # Convert km to meters
+                    "type": "pharmacy",
+                    "language": "en",
+                    "key": self.google_api_key,
+                }
+                async with session.get(PLACES_NEARBY_URL, params=params) as response:
+                    places_result = await response.json()
+                # Same status handling as googlemaps.Client
+                status = places_result.get("status")
+                if status not in ("OK", "ZERO_RESULTS"):
+                    raise RuntimeError(places_result.get("error_message", status))
+                result = self._build_chemists_result(
+                    location, radius_km, places_result)
+                _store_places(cache_key, result)
 
         except Exception as e:
-            result = {
-                "error": f"Failed to search chemists: {str(e)}",
-                "fallback": "Try searching 'pharmacy near me' on Google Maps",
-                "common_chains": ["Apollo Pharmacy", "MedPlus", "Netmeds", "1mg", "Guardian Pharmacy"]
-            }
+            result = self._chemist_search_failed(e)
 
         self._log_session({
             "type": "chemist_search",
             "input": location,
-            "output": result,
-            "timestamp": datetime.now().isoformat()
+            "output": result
         })
 
         return result
 
+    def _places_configured(self) -> bool:
+        """Whether a real Google Places API key is set"""
+        return bool(self.google_api_key) and self.google_api_key != "your_google_places_api_key_here"
+
+    def _places_not_configured(self, location: str) -> Dict[str, Any]:
+        """Manual search advice when no Places API key is set"""
+        return {
+            "error": "Google Places API key not configured",
+            "message": "Please add your Google Places API key to .env file",
+            "manual_search": f"Search for 'pharmacy near {location}' on Google Maps",
+            "common_chains": ["Apollo Pharmacy", "MedPlus", "Netmeds", "1mg", "Guardian Pharmacy"]
+        }
+
+    def _build_chemists_result(self, location: str, radius_km: float,
+                               places_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a Places nearby-search response into the tool result"""
+        chemists = []
+        # Limit to 5 results
+        for place in places_result.get('results', [])[:5]:
+            chemist = {
+                "name": place.get('name', 'Unknown'),
+                "address": place.get('vicinity', 'Address not available'),
+                "rating": place.get('rating', 'Not rated'),
+                "open_now": place.get('opening_hours', {}).get('open_now', 'Unknown'),
+                "place_id": place.get('place_id', ''),
+            }
+
+            # Add Google Maps link
+            if 'geometry' in place:
+                lat = place['geometry']['location']['lat']
+                lng = place['geometry']['location']['lng']
+                chemist['maps_link'] = f"https://maps.google.com/?q={lat},{lng}"
+                # Would need additional API call
+                chemist['distance_km'] = "Calculating..."
+
+            chemists.append(chemist)
+
+        return {
+            "location": location,
+            "radius_km": radius_km,
+            "total_found": len(chemists),
+            "chemists": chemists,
+            "search_timestamp": datetime.now().isoformat(),
+            "note": "Call ahead to confirm medicine availability"
+        }
+
+    def _chemist_search_failed(self, error: Exception) -> Dict[str, Any]:
+        """Fallback advice when the Places lookup fails"""
+        return {
+            "error": f"Failed to search chemists: {str(error)}",
+            "fallback": "Try searching 'pharmacy near me' on Google Maps",
+            "common_chains": ["Apollo Pharmacy", "MedPlus", "Netmeds", "1mg", "Guardian Pharmacy"]
+        }
+
     def get_session_logs(self, limit: int = 10) -> Dict[str, Any]:
         """Get recent session logs"""
-        recent_sessions = self.sessions[-limit:]
         return {
             "total_sessions": len(self.sessions),
-            "recent_sessions": recent_sessions,
+            "recent_sessions": list(self.iter_session_logs(limit)),
             "server_uptime": "Running"
         }
 
-    # --- HELPER METHODS ---
+    def iter_session_logs(self, limit: int = 10) -> Iterator[Dict[str, Any]]:
+        """Iterate the sessions[-limit:] window, formatting each one on demand"""
+        total = len(self.sessions)
+        start = max(total - limit, 0) if limit > 0 else min(-limit, total)
+        # Take the window now: the deque may change while this is consumed
+        recent = tuple(islice(self.sessions, start, None))
+        return (
+            {**session, "timestamp": datetime.fromtimestamp(
+                timestamp_ns / 1e9).isoformat()}
+            for timestamp_ns, session in recent
+        )
 
-    def _identify_condition(self, symptoms_lower: str) -> str:
-        """Identify primary condition from symptoms"""
-        if any(word in symptoms_lower for word in ["fever", "temperature", "hot", "burning"]):
-            return "fever"
-        elif any(word in symptoms_lower for word in ["headache", "head pain", "migraine"]):
-            return "headache"
-        elif any(word in symptoms_lower for word in ["cough", "coughing"]):
-            return "cough"
-        elif any(word in symptoms_lower for word in ["cold", "runny nose", "sore throat", "sneezing"]):
-            return "cold"
-        elif any(word in symptoms_lower for word in ["stomach", "nausea", "vomiting", "diarrhea"]):
-            return "stomach_upset"
-        elif any(word in symptoms_lower for word in ["pain", "ache", "hurt"]):
-            return "pain"
-        else:
-            return "general"
-
-    def _determine_triage_level(self, symptoms_lower: str, condition: str) -> str:
-        """Determine triage level based on symptoms"""
-        # High priority symptoms
-        if any(word in symptoms_lower for word in ["severe", "extreme", "unbearable", "intense"]):
-            return "urgent"
-        elif any(word in symptoms_lower for word in ["high fever", "103", "persistent", "worsening"]):
-            return "routine"
-        else:
-            return "self_care"
-
-    def _map_condition_to_medicine(self, condition_lower: str) -> str:
-        """Map condition description to medicine database key"""
-        if any(word in condition_lower for word in ["fever", "temperature"]):
-            return "fever"
-        elif any(word in condition_lower for word in ["headache", "head pain"]):
-            return "headache"
-        elif any(word in condition_lower for word in ["pain", "ache"]):
-            return "pain"
-        elif any(word in condition_lower for word in ["cold", "cough"]):
-            return "cold"
-        else:
-            return ""
+    # --- HELPER METHODS ---
 
     def _get_follow_up_advice(self, triage_level: str) -> str:
         """Get follow-up advice based on triage level"""
-        advice = {
-            "emergency": "Seek immediate medical attention",
-            "urgent": "See a doctor within 24 hours",
-            "routine": "Schedule appointment with doctor within 1-2 weeks if symptoms persist",
-            "self_care": "Monitor symptoms. See doctor if they worsen or persist beyond 3-5 days"
-        }
-        return advice.get(triage_level, "Consult healthcare professional if concerned")
+        return FOLLOW_UP_ADVICE.get(triage_level, FOLLOW_UP_DEFAULT)
 
-    def _get_warning_signs(self, condition: str) -> List[str]:
+    def _get_warning_signs(self, condition: str) -> Tuple[str, ...]:
         """Get warning signs to watch for"""
-        warning_signs = {
-            "fever": ["Temperature above 103°F (39.4°C)", "Persistent fever beyond 3 days", "Difficulty breathing"],
-            "headache": ["Sudden severe headache", "Headache with neck stiffness", "Changes in vision"],
-            "cough": ["Blood in cough", "Difficulty breathing", "Chest pain"],
-            "cold": ["High fever", "Severe throat pain", "Ear pain"],
-            "general": ["Worsening symptoms", "New severe symptoms", "Signs of dehydration"]
-        }
-        return warning_signs.get(condition, warning_signs["general"])
+        return WARNING_SIGNS.get(condition, WARNING_SIGNS["general"])
 
     def _filter_otc_list(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter LLM-proposed medicines to OTC-only by simple rules."""
@@ -648,11 +911,13 @@ class MedicalMCPServer:
         return filtered
 
     def _log_session(self, session_data: Dict[str, Any]):
-        """Log session data"""
-        self.sessions.append(session_data)
-        # Keep only last 100 sessions
-        if len(self.sessions) > 100:
-            self.sessions = self.sessions[-100:]
+        """Log session data with its raw arrival time"""
+        captured = getattr(_captured_sessions, "sessions", None)
+        if captured is not None:
+            # Computing a cacheable reply: handle_mcp_request_cached logs it
+            captured.append(session_data)
+            return
+        self.sessions.append((time.time_ns(), session_data))
 
 
 # --- CREATE SERVER INSTANCE ---
@@ -667,8 +932,7 @@ def handle_mcp_request(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         if method == "analyze_symptoms":
             symptoms = params.get("symptoms", "")
             age = params.get("age", "adult")
-            location = params.get("location")
-            return medical_server.analyze_symptoms(symptoms, age, location)
+            return medical_server.analyze_symptoms(symptoms, age)
 
         elif method == "suggest_medicine":
             condition = params.get("condition", "")
@@ -689,49 +953,7 @@ def handle_mcp_request(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
             return medical_server.get_session_logs(limit)
 
         elif method == "list_tools":
-            return {
-                "tools": [
-                    {
-                        "name": "analyze_symptoms",
-                        "description": "Analyze symptoms and provide triage recommendations",
-                        "parameters": {
-                            "symptoms": "string (required) - Description of symptoms",
-                            "age": "string (optional) - Patient age group (child/adult/elderly)",
-                            "location": "string (optional) - Location for emergency services"
-                        }
-                    },
-                    {
-                        "name": "suggest_medicine",
-                        "description": "Suggest safe over-the-counter medicines",
-                        "parameters": {
-                            "condition": "string (required) - Medical condition or symptoms",
-                            "age": "string (optional) - Patient age group"
-                        }
-                    },
-                    {
-                        "name": "get_remedies",
-                        "description": "Get home remedies for common conditions",
-                        "parameters": {
-                            "condition": "string (required) - Medical condition"
-                        }
-                    },
-                    {
-                        "name": "find_chemists",
-                        "description": "Find nearby pharmacies/chemists",
-                        "parameters": {
-                            "location": "string (required) - Location to search near",
-                            "radius_km": "float (optional) - Search radius in kilometers (default: 5.0)"
-                        }
-                    },
-                    {
-                        "name": "get_session_logs",
-                        "description": "Get recent consultation logs",
-                        "parameters": {
-                            "limit": "int (optional) - Number of recent sessions (default: 10)"
-                        }
-                    }
-                ]
-            }
+            return TOOLS_LIST
 
         else:
             return {"error": f"Unknown method: {method}"}
@@ -743,6 +965,104 @@ def handle_mcp_request(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+# Deterministic lookups whose replies can be reused across users.
+# analyze_symptoms stays uncached (safety critical), get_session_logs changes
+# with every call and find_chemists has its own TTL cache.
+CACHEABLE_METHODS = frozenset({"suggest_medicine", "get_remedies", "list_tools"})
+
+
+# Sessions logged while _cached_mcp_request runs, per thread
+_captured_sessions = threading.local()
+
+
+class _UncachedResult(Exception):
+    """Carries a reply out of _cached_mcp_request without caching it"""
+
+    def __init__(self, result: Dict[str, Any], sessions: Tuple[Dict[str, Any], ...]):
+        super().__init__()
+        self.result = result
+        self.sessions = sessions
+
+
+@lru_cache(maxsize=1024)
+def _cached_mcp_request(method: str, frozen_params: Tuple) -> Tuple[MappingProxyType, Tuple[Dict[str, Any], ...]]:
+    """Run a cacheable call once: (read-only reply, sessions it logged)"""
+    _captured_sessions.sessions = captured = []
+    try:
+        result = handle_mcp_request(method, dict(frozen_params))
+    finally:
+        _captured_sessions.sessions = None
+    # lru_cache never stores a raised call: keep errors and LLM fallbacks retryable
+    if "error" in result or "llm_error" in result:
+        raise _UncachedResult(result, tuple(captured))
+    # Every caller shares this reply, so hand it out read-only
+    return MappingProxyType(result), tuple(captured)
+
+
+def handle_mcp_request_cached(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """handle_mcp_request with an LRU cache for CACHEABLE_METHODS.
+
+    The sessions a call logs are cached with its reply and logged again on
+    every hit, so /logs looks the same as without the cache.
+    """
+    if method not in CACHEABLE_METHODS:
+        return handle_mcp_request(method, params)
+    try:
+        frozen_params = tuple(sorted(params.items()))
+        hash(frozen_params)
+    except (AttributeError, TypeError):
+        # Non-dict params or unhashable values (lists): answer uncached
+        return handle_mcp_request(method, params)
+    try:
+        result, sessions = _cached_mcp_request(method, frozen_params)
+    except _UncachedResult as e:
+        result, sessions = e.result, e.sessions
+    for session_data in sessions:
+        medical_server._log_session(session_data)
+    return result
+
+
+def handle_mcp_batch(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Handle a list of {"method", "params"} MCP calls in one pass"""
+    return [handle_mcp_request_cached(call.get("method", ""), call.get("params", {}))
+            for call in calls]
+
+
+async def handle_mcp_request_async(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of handle_mcp_request_cached that never blocks the loop"""
+    if method != "find_chemists":
+        # Gemini calls block for up to 30s; run them (and the rest) in a thread
+        return await asyncio.to_thread(handle_mcp_request_cached, method, params)
+
+    try:
+        location = params.get("location", "")
+        radius = params.get("radius_km", 5.0)
+        return await medical_server.find_nearby_chemists_async(location, radius)
+    except Exception as e:
+        return {
+            "error": f"Server error: {str(e)}",
+            "disclaimer": "Please consult a healthcare professional"
+        }
+
+
+async def handle_mcp_batch_async(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Handle a list of MCP calls, overlapping their network lookups"""
+    return list(await asyncio.gather(*(
+        handle_mcp_request_async(call.get("method", ""), call.get("params", {}))
+        for call in calls)))
+
+
+def handle_mcp_request_bytes(method: str, params: Dict[str, Any]) -> bytes:
+    """Handle an MCP request and return the JSON-encoded result"""
+    return orjson.dumps(handle_mcp_request(method, params), default=dict)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Pretty-print a response as indented JSON bytes"""
+    return orjson.dumps(obj, default=dict,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
 # --- MAIN FUNCTION FOR TESTING ---
 def main():
     """Test the MCP server functionality"""
@@ -755,33 +1075,33 @@ def main():
         "symptoms": "fever and headache since 2 days",
         "age": "adult"
     })
-    print(json.dumps(result, indent=2))
+    print(_dumps(result).decode())
 
     # Test 2: Medicine suggestion
     print("\n💊 Test 2: Medicine suggestion")
     result = handle_mcp_request("suggest_medicine", {
         "condition": "headache"
     })
-    print(json.dumps(result, indent=2))
+    print(_dumps(result).decode())
 
     # Test 3: Home remedies
     print("\n🏠 Test 3: Home remedies")
     result = handle_mcp_request("get_remedies", {
         "condition": "cold and cough"
     })
-    print(json.dumps(result, indent=2))
+    print(_dumps(result).decode())
 
     # Test 4: Emergency detection
     print("\n🚨 Test 4: Emergency detection")
     result = handle_mcp_request("analyze_symptoms", {
         "symptoms": "severe chest pain and difficulty breathing"
     })
-    print(json.dumps(result, indent=2))
+    print(_dumps(result).decode())
 
     # Test 5: Tool discovery
     print("\n🔧 Test 5: Available tools")
     result = handle_mcp_request("list_tools", {})
-    print(json.dumps(result, indent=2))
+    print(_dumps(result).decode())
 
     print("\n✅ All tests completed!")
     print("🚀 MCP Server is working correctly!")
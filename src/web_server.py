@@ -6,170 +6,395 @@ FastAPI wrapper for the medical MCP server
 Built for Puch.ai Hackathon 2025
 """
 
-import json
+import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from itertools import count
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse
+import orjson
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
 import uvicorn
 
-# Import our MCP server logic
-from simple_mcp import handle_mcp_request, medical_server
+try:
+    import msgspec  # Optional typed single-pass decoding of /mcp bodies
+except ImportError:
+    msgspec = None
+
+# Import our MCP server logic (loads .env)
+from simple_mcp import (close_aiohttp_session, handle_mcp_batch_async,
+                        handle_mcp_request, handle_mcp_request_async,
+                        handle_mcp_request_bytes, medical_server)
+from config import get_settings
+
+S = get_settings()
 
 # Create FastAPI app
 app = FastAPI(
     title="Medical Assistant MCP Server",
     description="Simple medical guidance through MCP protocol",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    # ENV=prod drops Swagger/ReDoc and the OpenAPI schema entirely
+    docs_url=None if S.PROD else "/docs",
+    redoc_url=None if S.PROD else "/redoc",
+    openapi_url=None if S.PROD else "/openapi.json"
 )
 
+class AllowAllCORSMiddleware:
+    """Pure ASGI CORS allowing every origin, method and header.
+
+    Same headers as CORSMiddleware(allow_origins=["*"], allow_credentials=True)
+    for those settings, without its per-request origin and header checks.
+    Requests without an Origin header (same-origin, server to server) pass
+    straight through.
+    """
+
+    PREFLIGHT_HEADERS = [
+        (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+        (b"access-control-allow-credentials", b"true"),
+        (b"access-control-max-age", b"600"),
+        (b"vary", b"Origin"),
+    ]
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin")
+        if origin is None:
+            return await self.app(scope, receive, send)
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            preflight = [(b"access-control-allow-origin", origin), *self.PREFLIGHT_HEADERS]
+            requested_headers = headers.get(b"access-control-request-headers")
+            if requested_headers:
+                preflight.append((b"access-control-allow-headers", requested_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": preflight})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # Credentialed (cookie) requests need the explicit origin, not "*"
+        cors_headers = [(b"access-control-allow-credentials", b"true")]
+        if b"cookie" in headers:
+            cors_headers += [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        else:
+            cors_headers.append((b"access-control-allow-origin", b"*"))
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+# Largest /mcp request body accepted; real tool calls are well under 1 KB
+MAX_MCP_BODY_BYTES = 16 * 1024
+
+# Encoded 413 reply for bodies over the limit
+TOO_LARGE_JSON = orjson.dumps({
+    "id": None,
+    "error": {"code": -32600, "message": "Request body too large"},
+    "jsonrpc": "2.0"
+})
+# Encoded 400 reply for a Content-Length that is not a number
+BAD_LENGTH_JSON = orjson.dumps({
+    "id": None,
+    "error": {"code": -32600, "message": "Invalid Content-Length"},
+    "jsonrpc": "2.0"
+})
+
+async def send_json(send, status: int, body: bytes):
+    """Send an already encoded JSON reply over ASGI"""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class MaxBodySizeMiddleware:
+    """Reject POST /mcp with a Content-Length over MAX_MCP_BODY_BYTES (413)
+
+    Chunked bodies carry no Content-Length; read_body enforces the same
+    limit on those as it reads.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] == "http" and scope["path"] == "/mcp"
+                and scope["method"] == "POST"):
+            length = dict(scope["headers"]).get(b"content-length")
+            if length is not None:
+                try:
+                    too_large = int(length) > MAX_MCP_BODY_BYTES
+                except ValueError:
+                    return await send_json(send, 400, BAD_LENGTH_JSON)
+                if too_large:
+                    return await send_json(send, 413, TOO_LARGE_JSON)
+        await self.app(scope, receive, send)
+
+# Added first so it runs inside CORS and the 413 still carries CORS headers
+app.add_middleware(MaxBodySizeMiddleware)
+
 # Enable CORS for Puch.ai integration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(AllowAllCORSMiddleware)  # Configure for production
 
 # --- API ENDPOINTS ---
 
+ROOT_ENDPOINTS = {
+    "health": "/health",
+    "mcp": "/mcp (POST)",
+    "test": "/test"
+}
+if app.docs_url:
+    ROOT_ENDPOINTS["docs"] = app.docs_url
+
+# Static server info, encoded once
+ROOT_JSON = orjson.dumps({
+    "name": "Medical Assistant MCP Server",
+    "version": "1.0.0",
+    "status": "running",
+    "description": "Simple medical guidance through MCP protocol",
+    "endpoints": ROOT_ENDPOINTS,
+    "available_tools": [
+        "analyze_symptoms",
+        "suggest_medicine", 
+        "get_remedies",
+        "find_chemists",
+        "get_session_logs"
+    ]
+})
+
+# Health fields that never change; only the timestamp is per request
+HEALTH_STATIC = {
+    "version": "1.0.0",
+    "services": {
+        "mcp_server": "active",
+        "medical_tools": "active",
+        "session_logging": "active"
+    }
+}
+# Encoded health reply split around the timestamp value
+HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+HEALTH_SUFFIX = b'",' + orjson.dumps(HEALTH_STATIC)[1:]
+
 @app.get("/")
 async def root():
     """Root endpoint with server info"""
-    return {
-        "name": "Medical Assistant MCP Server",
-        "version": "1.0.0",
-        "status": "running",
-        "description": "Simple medical guidance through MCP protocol",
-        "endpoints": {
-            "health": "/health",
-            "mcp": "/mcp (POST)",
-            "test": "/test",
-            "docs": "/docs"
-        },
-        "available_tools": [
-            "analyze_symptoms",
-            "suggest_medicine", 
-            "get_remedies",
-            "find_chemists",
-            "get_session_logs"
-        ]
-    }
+    return Response(content=ROOT_JSON, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    timestamp = datetime.now().isoformat().encode()
+    return Response(content=HEALTH_PREFIX + timestamp + HEALTH_SUFFIX,
+                    media_type="application/json")
+
+async def read_body(receive, limit: int) -> Optional[bytes]:
+    """Collect the request body from ASGI receive events
+
+    Returns None as soon as more than `limit` bytes have arrived.
+    """
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+# Fallback ids for calls without one; next() on a count is atomic in CPython
+request_counter = count()
+
+def mcp_error(request_id, code: int, message: str) -> Dict[str, Any]:
+    """JSON-RPC error envelope"""
     return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0",
-        "services": {
-            "mcp_server": "active",
-            "medical_tools": "active",
-            "session_logging": "active"
-        }
+        "id": request_id,
+        "error": {"code": code, "message": message},
+        "jsonrpc": "2.0"
     }
 
-@app.post("/mcp")
-async def mcp_endpoint(request: Request):
-    """Main MCP interface endpoint"""
+class InvalidMCPRequest(ValueError):
+    """Body is valid JSON but not a call or batch object"""
+
+if msgspec is not None:
+    class MCPRequest(msgspec.Struct):
+        """One /mcp call, or a batch of them, decoded straight into slots"""
+        method: str = ""
+        params: Optional[Dict[str, Any]] = {}
+        id: Any = None
+        batch: Optional[List[Dict[str, Any]]] = None
+
+    mcp_decoder = msgspec.json.Decoder(MCPRequest)
+    JSON_ERRORS = (orjson.JSONDecodeError, msgspec.DecodeError)
+    # ValidationError subclasses DecodeError, so shape errors are caught first
+    SHAPE_ERRORS = (InvalidMCPRequest, msgspec.ValidationError)
+else:
+    JSON_ERRORS = (orjson.JSONDecodeError,)
+    SHAPE_ERRORS = (InvalidMCPRequest,)
+
+def decode_mcp_request(body: bytes) -> Tuple[Optional[List[Dict[str, Any]]], str, Dict[str, Any], Any]:
+    """Parse a /mcp body into (batch, method, params, id)
+
+    Both paths accept the same shapes: an object with a str method, dict
+    (or null) params and, for batches, a list of objects.
+    """
+    if msgspec is not None:
+        req = mcp_decoder.decode(body)
+        params = {} if req.params is None else req.params
+        return req.batch, req.method, params, req.id
+
+    data = orjson.loads(body)
+    if not isinstance(data, dict):
+        raise InvalidMCPRequest
+    batch = data.get("batch")
+    method = data.get("method", "")
+    params = data.get("params")
+    if params is None:
+        # "params": null means no params, as in main.py
+        params = {}
+    if batch is not None and not (
+            isinstance(batch, list) and all(isinstance(call, dict) for call in batch)):
+        raise InvalidMCPRequest
+    if not isinstance(method, str) or not isinstance(params, dict):
+        raise InvalidMCPRequest
+    return batch, method, params, data.get("id")
+
+async def mcp_endpoint(body: bytes) -> Tuple[int, Any]:
+    """Main MCP interface: turn a raw request body into (HTTP status, JSON-RPC reply)
+
+    Errors carry a 4xx/5xx status so proxies and clients can tell them
+    apart from successful (cacheable) replies.
+    """
+    if not body:
+        return 400, mcp_error(None, -32700, "Empty request body")
+
+    request_id = None
     try:
         # Parse request body
-        body = await request.body()
-        if body:
-            data = json.loads(body)
-        else:
-            raise HTTPException(status_code=400, detail="Empty request body")
+        calls, method, params, request_id = decode_mcp_request(body)
         
-        # Extract MCP request components
-        method = data.get("method", "")
-        params = data.get("params", {})
-        request_id = data.get("id", f"req_{datetime.now().timestamp()}")
+        # Batched calls: {"batch": [{"method": ..., "params": ..., "id": ...}]}
+        if calls is not None:
+            results = await handle_mcp_batch_async(calls)
+            return 200, [
+                {"id": call.get("id"), "result": result, "jsonrpc": "2.0"}
+                for call, result in zip(calls, results)
+            ]
+
+        if request_id is None:
+            request_id = f"req_{next(request_counter)}"
         
         if not method:
-            return {
-                "id": request_id,
-                "error": {"code": -32601, "message": "Method required"},
-                "jsonrpc": "2.0"
-            }
+            return 400, mcp_error(request_id, -32601, "Method required")
         
-        # Handle the MCP request
-        result = handle_mcp_request(method, params)
+        # Blocking tools run in a thread; chemist lookups use aiohttp
+        result = await handle_mcp_request_async(method, params)
         
         # Return MCP-compliant response
-        return {
+        return 200, {
             "id": request_id,
             "result": result,
             "jsonrpc": "2.0"
         }
         
-    except json.JSONDecodeError:
-        return {
-            "id": None,
-            "error": {"code": -32700, "message": "Parse error"},
-            "jsonrpc": "2.0"
-        }
+    except SHAPE_ERRORS:
+        return 400, mcp_error(None, -32600, "Invalid Request")
+    except JSON_ERRORS:
+        return 400, mcp_error(None, -32700, "Parse error")
     except Exception as e:
-        return {
-            "id": request_id if 'request_id' in locals() else None,
-            "error": {"code": -32603, "message": str(e)},
-            "jsonrpc": "2.0"
-        }
+        return 500, mcp_error(request_id, -32603, str(e))
+
+class MCPApp:
+    """Pure ASGI app for /mcp, bypassing FastAPI's request/response layers"""
+
+    async def __call__(self, scope, receive, send):
+        body = await read_body(receive, MAX_MCP_BODY_BYTES)
+        if body is None:
+            return await send_json(send, 413, TOO_LARGE_JSON)
+        status, reply = await mcp_endpoint(body)
+        await send_json(send, status, orjson.dumps(reply, default=dict))
+
+# Added as a plain route: it still runs behind the app's CORS middleware
+app.router.routes.append(Route("/mcp", MCPApp(), methods=["POST"]))
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close the shared aiohttp session used by chemist lookups"""
+    await close_aiohttp_session()
+
+# (name, method, params) for each /test case
+TEST_CASES = (
+    ("Basic Symptom Analysis", "analyze_symptoms",
+     MappingProxyType({"symptoms": "fever and headache", "age": "adult"})),
+    ("Medicine Suggestion", "suggest_medicine",
+     MappingProxyType({"condition": "headache"})),
+    ("Home Remedies", "get_remedies",
+     MappingProxyType({"condition": "cold"})),
+    ("Emergency Detection", "analyze_symptoms",
+     MappingProxyType({"symptoms": "severe chest pain"})),
+)
+TEST_SUMMARY = f"Completed {len(TEST_CASES)} tests"
 
 @app.get("/test")
 async def test_endpoint():
     """Quick test endpoint to verify functionality"""
-    test_cases = [
-        {
-            "name": "Basic Symptom Analysis",
-            "method": "analyze_symptoms",
-            "params": {"symptoms": "fever and headache", "age": "adult"}
-        },
-        {
-            "name": "Medicine Suggestion",
-            "method": "suggest_medicine", 
-            "params": {"condition": "headache"}
-        },
-        {
-            "name": "Home Remedies",
-            "method": "get_remedies",
-            "params": {"condition": "cold"}
-        },
-        {
-            "name": "Emergency Detection",
-            "method": "analyze_symptoms",
-            "params": {"symptoms": "severe chest pain"}
-        }
-    ]
-    
+    # Run the independent cases concurrently
+    outcomes = await asyncio.gather(*(
+        run_in_threadpool(handle_mcp_request, method, params)
+        for _, method, params in TEST_CASES
+    ), return_exceptions=True)
+
     results = {}
-    for test in test_cases:
-        try:
-            result = handle_mcp_request(test["method"], test["params"])
-            results[test["name"]] = {
-                "status": "success",
-                "result": result
-            }
-        except Exception as e:
-            results[test["name"]] = {
+    for (name, _, _), outcome in zip(TEST_CASES, outcomes):
+        if isinstance(outcome, Exception):
+            results[name] = {
                 "status": "error", 
-                "error": str(e)
+                "error": str(outcome)
+            }
+        else:
+            results[name] = {
+                "status": "success",
+                "result": outcome
             }
     
     return {
         "server": "Medical Assistant MCP Server",
         "test_timestamp": datetime.now().isoformat(),
         "test_results": results,
-        "summary": f"Completed {len(test_cases)} tests"
+        "summary": TEST_SUMMARY
     }
 
+@lru_cache(maxsize=1)
+def cached_tools_json() -> bytes:
+    """Encoded tool catalog; it never changes while the process runs"""
+    return handle_mcp_request_bytes("list_tools", {})
+
+TOOLS_HEADERS = {"Cache-Control": "public, max-age=300"}
+
 @app.get("/tools")
 async def list_tools():
     """List available MCP tools"""
-    return handle_mcp_request("list_tools", {})
+    return Response(content=cached_tools_json(), media_type="application/json",
+                    headers=TOOLS_HEADERS)
 
 @app.get("/logs")
 async def get_logs(limit: int = 10):
@@ -177,10 +402,7 @@ async def get_logs(limit: int = 10):
     return handle_mcp_request("get_session_logs", {"limit": limit})
 
 # --- DEMO INTERFACE ---
-@app.get("/demo", response_class=HTMLResponse)
-async def demo_interface():
-    """Simple demo interface for testing"""
-    html_content = """
+DEMO_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -325,22 +547,45 @@ async def demo_interface():
     </body>
     </html>
     """
-    return HTMLResponse(content=html_content)
+# Static page: encode once and let browsers cache it
+DEMO_HTML_BYTES = DEMO_HTML.encode("utf-8")
+DEMO_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+@app.get("/demo", response_class=HTMLResponse)
+async def demo_interface():
+    """Simple demo interface for testing"""
+    return HTMLResponse(content=DEMO_HTML_BYTES, headers=DEMO_HEADERS)
 
 # --- STARTUP ---
 if __name__ == "__main__":
     print("🏥 Starting Medical Assistant MCP Server...")
-    print("📍 Server will be available at: http://localhost:8000")
-    print("🔍 Health check: http://localhost:8000/health")
-    print("🧪 Test endpoint: http://localhost:8000/test")
-    print("🎮 Demo interface: http://localhost:8000/demo")
-    print("⚡ MCP endpoint: http://localhost:8000/mcp")
-    print("📚 API docs: http://localhost:8000/docs")
+    print(f"📍 Server will be available at: http://localhost:{S.PORT}")
+    print(f"🔍 Health check: http://localhost:{S.PORT}/health")
+    print(f"🧪 Test endpoint: http://localhost:{S.PORT}/test")
+    print(f"🎮 Demo interface: http://localhost:{S.PORT}/demo")
+    print(f"⚡ MCP endpoint: http://localhost:{S.PORT}/mcp")
+    if app.docs_url:
+        print(f"📚 API docs: http://localhost:{S.PORT}{app.docs_url}")
     
+    # Session logs live in each worker's memory, and uvicorn does not
+    # restart workers that die: one worker unless WEB_CONCURRENCY asks
+    if not S.DEV and S.WEB_CONCURRENCY > 1:
+        print(f"⚠️ {S.WEB_CONCURRENCY} workers: /logs shows only the answering "
+              "worker's sessions")
+
+    # DEV=1 enables autoreload, which only works with a single worker
     uvicorn.run(
         "web_server:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
+        host=S.HOST,
+        port=S.PORT,
+        reload=S.DEV,
+        workers=None if S.DEV else S.WEB_CONCURRENCY,
+        loop="uvloop",
+        http="httptools",
+        log_level="info" if S.DEV else "warning",
+        access_log=S.DEV,
+        # Shed load past 500 open connections (503). No limit_max_requests:
+        # this uvicorn never restarts a worker that exits
+        limit_concurrency=500,
+        timeout_keep_alive=5
     )
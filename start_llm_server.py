@@ -9,6 +9,32 @@ import sys
 import subprocess
 from dotenv import load_dotenv
 
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+sys.path.insert(0, SRC_DIR)
+
+from config import get_settings
+
+
+def uvicorn_command():
+    """uvicorn CLI invocation for web_server, honouring DEV and WEB_CONCURRENCY"""
+    load_dotenv()
+    S = get_settings()
+    command = [
+        sys.executable, "-m", "uvicorn", "web_server:app",
+        "--app-dir", SRC_DIR,
+        "--host", S.HOST,
+        "--port", str(S.PORT),
+        "--loop", "uvloop",
+        "--http", "httptools",
+        "--limit-concurrency", "500",
+        "--timeout-keep-alive", "5",
+    ]
+    # DEV=1 enables autoreload, which only works with a single worker
+    if S.DEV:
+        return command + ["--reload", "--reload-dir", SRC_DIR]
+    return command + ["--workers", str(S.WEB_CONCURRENCY),
+                      "--log-level", "warning", "--no-access-log"]
+
 
 def check_openai_key():
     """Check if OpenAI API key is properly configured"""
@@ -64,7 +90,7 @@ def main():
 
     try:
         # Start the server
-        subprocess.run([sys.executable, "web_server.py"])
+        subprocess.run(uvicorn_command())
     except KeyboardInterrupt:
         print("\n🛑 Server stopped")
 
@@ -4,92 +4,116 @@ Quick test script for Medical MCP Server MVP
 Run this to verify your server is working
 """
 
-import requests
+import asyncio
 import json
 
+import httpx
+
 BASE_URL = "http://localhost:8000"
 
 
-def test_health():
+def format_response(label: str, response: httpx.Response) -> list:
+    """Output lines for one MCP call"""
+    return [
+        f"{label} - Status: {response.status_code}",
+        f"Response: {json.dumps(response.json(), indent=2)}",
+        "",
+    ]
+
+
+async def test_health(client: httpx.AsyncClient) -> list:
     """Test health endpoint"""
-    print("🔍 Testing health endpoint...")
-    response = requests.get(f"{BASE_URL}/health")
-    print(f"Status: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
+    lines = ["🔍 Testing health endpoint..."]
+    response = await client.get("/health")
+    lines.append(f"Status: {response.status_code}")
+    lines.append(f"Response: {response.json()}")
+    lines.append("")
+    return lines
 
 
-def test_basic_functionality():
+async def test_basic_functionality(client: httpx.AsyncClient) -> list:
     """Test basic MCP tools"""
-    print("🧪 Testing basic MCP tools...")
-
-    # Test analyze_symptoms
+    lines = ["🧪 Testing basic MCP tools..."]
+
+    calls = [
+        ("Analyze Symptoms", {
+            "method": "analyze_symptoms",
+            "params": {"symptoms": "fever and headache", "age": "adult"},
+            "id": "test-1"
+        }),
+        ("Suggest Medicine", {
+            "method": "suggest_medicine",
+            "params": {"condition": "headache"},
+            "id": "test-2"
+        }),
+        ("Get Remedies", {
+            "method": "get_remedies",
+            "params": {"condition": "cold"},
+            "id": "test-3"
+        }),
+        ("Null Params", {
+            "method": "list_tools",
+            "params": None,
+            "id": "test-4"
+        }),
+    ]
+
+    responses = await asyncio.gather(
+        *(client.post("/mcp", json=test_data) for _, test_data in calls))
+    for (label, _), response in zip(calls, responses):
+        lines += format_response(label, response)
+    # "params": null is treated as no params, not as a bad request
+    assert responses[-1].status_code == 200, f"Null params rejected: {responses[-1].status_code}"
+    return lines
+
+
+async def test_emergency_detection(client: httpx.AsyncClient) -> list:
+    """Test emergency detection"""
     test_data = {
         "method": "analyze_symptoms",
-        "params": {"symptoms": "fever and headache", "age": "adult"},
-        "id": "test-1"
-    }
-
-    response = requests.post(f"{BASE_URL}/mcp", json=test_data)
-    print(f"Analyze Symptoms - Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    print()
-
-    # Test suggest_medicine
-    test_data = {
-        "method": "suggest_medicine",
-        "params": {"condition": "headache"},
-        "id": "test-2"
-    }
-
-    response = requests.post(f"{BASE_URL}/mcp", json=test_data)
-    print(f"Suggest Medicine - Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    print()
-
-    # Test get_remedies
-    test_data = {
-        "method": "get_remedies",
-        "params": {"condition": "cold"},
-        "id": "test-3"
+        "params": {"symptoms": "severe chest pain and difficulty breathing"},
+        "id": "test-emergency"
     }
 
-    response = requests.post(f"{BASE_URL}/mcp", json=test_data)
-    print(f"Get Remedies - Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    print()
-
-
-def test_emergency_detection():
-    """Test emergency detection"""
-    print("🚨 Testing emergency detection...")
+    response = await client.post("/mcp", json=test_data)
+    lines = ["🚨 Testing emergency detection..."] + format_response("Emergency Test", response)
 
+    # Keywords split by a line break or extra spaces still count
     test_data = {
         "method": "analyze_symptoms",
-        "params": {"symptoms": "severe chest pain and difficulty breathing"},
-        "id": "test-emergency"
+        "params": {"symptoms": "severe chest\npain and  difficulty\tbreathing"},
+        "id": "test-emergency-whitespace"
     }
-
-    response = requests.post(f"{BASE_URL}/mcp", json=test_data)
-    print(f"Emergency Test - Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    print()
+    response = await client.post("/mcp", json=test_data)
+    triage_level = response.json()["result"]["triage_level"]
+    assert triage_level == "emergency", f"Split keywords not detected: {triage_level}"
+    return lines + format_response("Emergency Test (split whitespace)", response)
 
 
-def test_tool_discovery():
+async def test_tool_discovery(client: httpx.AsyncClient) -> list:
     """Test MCP tool discovery"""
-    print("🔍 Testing tool discovery...")
-
     test_data = {
         "method": "list_tools",
         "params": {},
         "id": "test-discovery"
     }
 
-    response = requests.post(f"{BASE_URL}/mcp", json=test_data)
-    print(f"Tool Discovery - Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    print()
+    response = await client.post("/mcp", json=test_data)
+    return ["🔍 Testing tool discovery..."] + format_response("Tool Discovery", response)
+
+
+async def run_tests():
+    """Run every check concurrently over one keep-alive connection pool"""
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=10) as client:
+        results = await asyncio.gather(
+            test_health(client),
+            test_basic_functionality(client),
+            test_emergency_detection(client),
+            test_tool_discovery(client),
+        )
+    # Print in a fixed order once everything has finished
+    for lines in results:
+        print("\n".join(lines))
 
 
 if __name__ == "__main__":
@@ -97,15 +121,12 @@ if __name__ == "__main__":
     print("=" * 50)
 
     try:
-        test_health()
-        test_basic_functionality()
-        test_emergency_detection()
-        test_tool_discovery()
+        asyncio.run(run_tests())
 
         print("✅ All tests completed!")
         print("🚀 Your MVP is working! Ready for Puch.ai integration.")
 
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ Server not running! Start it with: python src/main.py")
     except Exception as e:
         print(f"❌ Test failed: {e}")